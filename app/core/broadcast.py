@@ -0,0 +1,177 @@
+# app/core/broadcast.py
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+from fastapi.encoders import jsonable_encoder
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, str], Awaitable[None]]
+
+
+# ─────────────────────────────────────────────
+# 🧾 EVENT SERIALIZATION
+# ─────────────────────────────────────────────
+def serialize_event(message: Any) -> str:
+    # Done once per event; every recipient socket gets the same text frame.
+    # Models, ObjectIds etc. fall back to jsonable_encoder.
+    if orjson is not None:
+        return orjson.dumps(message, default=jsonable_encoder).decode("utf-8")
+
+    return json.dumps(message, default=jsonable_encoder, separators=(",", ":"))
+
+
+# ─────────────────────────────────────────────
+# 📣 BROADCAST BACKENDS
+# ─────────────────────────────────────────────
+class BroadcastBackend:
+    """
+    Carries socket events between uvicorn workers. `publish` sends an event
+    on a channel ("admin", "chat:<id>") as an already serialized JSON
+    payload; every worker's `deliver` callback is called with it,
+    including the publishing worker's own.
+    """
+
+    async def start(self, deliver: Deliver):
+        raise NotImplementedError
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, payload: str):
+        raise NotImplementedError
+
+
+class MemoryBroadcast(BroadcastBackend):
+    """Single-process backend: events only reach this worker's sockets."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    async def publish(self, channel: str, payload: str):
+        if self._deliver is not None:
+            await self._deliver(channel, payload)
+
+
+class MongoBroadcast(BroadcastBackend):
+    """
+    Fan-out through a capped collection. Each worker delivers its own events
+    directly and tails the collection (tailable await cursor) for events
+    published by other workers. Works on a standalone mongod, so a local
+    instance is enough for development and tests.
+    """
+
+    def __init__(self, collection: str, size_mb: int):
+        self.collection = collection
+        self.size_mb = size_mb
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._deliver: Optional[Deliver] = None
+        self._task: Optional[asyncio.Task] = None
+        self._db = None
+
+    async def start(self, deliver: Deliver):
+        from app.utils.database import get_database
+
+        self._deliver = deliver
+        self._db = await get_database()
+
+        try:
+            await self._db.create_collection(
+                self.collection,
+                capped=True,
+                size=self.size_mb * 1024 * 1024,
+            )
+        except CollectionInvalid:
+            pass
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._tail())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def publish(self, channel: str, payload: str):
+        await self._deliver(channel, payload)
+
+        await self._db[self.collection].insert_one({
+            "origin": self.origin,
+            "channel": channel,
+            "payload": payload,
+            "created_at": datetime.utcnow(),
+        })
+
+    async def _tail(self):
+        collection = self._db[self.collection]
+
+        # Only events published after this worker started
+        since = datetime.utcnow()
+        seen = deque(maxlen=1024)
+
+        while True:
+            try:
+                cursor = collection.find(
+                    {"created_at": {"$gte": since}, "origin": {"$ne": self.origin}},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                )
+
+                while cursor.alive:
+                    async for event in cursor:
+                        since = event["created_at"]
+
+                        # Resuming on created_at can return the last few events again
+                        if event["_id"] in seen:
+                            continue
+                        seen.append(event["_id"])
+
+                        try:
+                            await self._deliver(event["channel"], event["payload"])
+                        except Exception:
+                            logger.exception("Broadcast delivery failed")
+
+                    # Cursor is idle (awaitData timed out); keep waiting on it
+                    await asyncio.sleep(0)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Broadcast tail cursor failed; reopening")
+
+            # A tailable cursor dies immediately on an empty capped collection
+            await asyncio.sleep(0.5)
+
+
+def create_broadcast_backend() -> BroadcastBackend:
+    if settings.BROADCAST_BACKEND == "mongo":
+        return MongoBroadcast(
+            collection=settings.BROADCAST_COLLECTION,
+            size_mb=settings.BROADCAST_COLLECTION_SIZE_MB,
+        )
+
+    return MemoryBroadcast()
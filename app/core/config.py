@@ -45,6 +45,47 @@ class Settings(BaseSettings):
     CONTEXT_BOOST: float
     FUZZY_THRESHOLD: float
     MAX_CONTEXT_MESSAGES: int
+    EMBEDDING_ENGINE: str = Field(default="torch", env="EMBEDDING_ENGINE")
+    ONNX_MODEL_DIR: str = Field(default="models/all-MiniLM-L6-v2-onnx", env="ONNX_MODEL_DIR")
+    ONNX_QUANTIZED: bool = Field(default=True, env="ONNX_QUANTIZED")
+    EMBEDDING_WARMUP: bool = Field(default=True, env="EMBEDDING_WARMUP")
+    EMBEDDING_SIDECAR_SOCKET: str = Field(default="", env="EMBEDDING_SIDECAR_SOCKET")
+    EMBEDDING_SIDECAR_TIMEOUT_SECONDS: float = Field(default=30, env="EMBEDDING_SIDECAR_TIMEOUT_SECONDS")
+    EMBEDDING_PROCESS_POOL_SIZE: int = Field(default=0, env="EMBEDDING_PROCESS_POOL_SIZE")
+    EMBEDDING_PROCESS_QUEUE_SIZE: int = Field(default=4, env="EMBEDDING_PROCESS_QUEUE_SIZE")
+    EMBEDDING_PROCESS_CHUNK_SIZE: int = Field(default=64, env="EMBEDDING_PROCESS_CHUNK_SIZE")
+    EMBEDDING_PROCESS_BULK_SLOTS: int = Field(default=1, env="EMBEDDING_PROCESS_BULK_SLOTS")
+    EMBEDDING_BATCH_SIZE: int = Field(default=32, env="EMBEDDING_BATCH_SIZE")
+    EMBEDDING_BATCH_WAIT_MS: float = Field(default=5, env="EMBEDDING_BATCH_WAIT_MS")
+    EMBEDDING_CACHE_SIZE: int = Field(default=10000, env="EMBEDDING_CACHE_SIZE")
+    EMBEDDING_CACHE_PERSIST: bool = Field(default=True, env="EMBEDDING_CACHE_PERSIST")
+    EMBEDDING_CACHE_TTL_DAYS: float = Field(default=30, env="EMBEDDING_CACHE_TTL_DAYS")
+    CONVERSATION_EMBEDDING_BATCH_SIZE: int = Field(default=64, env="CONVERSATION_EMBEDDING_BATCH_SIZE")
+    CONVERSATION_EMBEDDING_POLL_SECONDS: float = Field(default=5, env="CONVERSATION_EMBEDDING_POLL_SECONDS")
+    CONVERSATION_EMBEDDING_LEASE_SECONDS: float = Field(default=60, env="CONVERSATION_EMBEDDING_LEASE_SECONDS")
+    CHAT_SESSION_FLUSH_SECONDS: float = Field(default=1, env="CHAT_SESSION_FLUSH_SECONDS")
+    CHAT_WRITE_TRANSACTIONS: bool = Field(default=False, env="CHAT_WRITE_TRANSACTIONS")
+    DENORMALIZED_SENDERS: bool = Field(default=False, env="DENORMALIZED_SENDERS")
+    INTENT_INDEX_TTL_SECONDS: int = Field(default=300, env="INTENT_INDEX_TTL_SECONDS")
+    INTENT_ANN_BACKEND: str = Field(default="exact", env="INTENT_ANN_BACKEND")
+    INTENT_ANN_TOP_K: int = Field(default=50, env="INTENT_ANN_TOP_K")
+    INTENT_ANN_NLIST: int = Field(default=0, env="INTENT_ANN_NLIST")
+    INTENT_ANN_NPROBE: int = Field(default=8, env="INTENT_ANN_NPROBE")
+    INTENT_ANN_INDEX_PATH: str = Field(default="data/intent_ivf.npz", env="INTENT_ANN_INDEX_PATH")
+    BROADCAST_BACKEND: str = Field(default="memory", env="BROADCAST_BACKEND")
+    BROADCAST_COLLECTION: str = Field(default="socket_events", env="BROADCAST_COLLECTION")
+    BROADCAST_COLLECTION_SIZE_MB: int = Field(default=64, env="BROADCAST_COLLECTION_SIZE_MB")
+    SOCKET_SEND_TIMEOUT_SECONDS: float = Field(default=5, env="SOCKET_SEND_TIMEOUT_SECONDS")
+    SOCKET_QUEUE_SIZE: int = Field(default=100, env="SOCKET_QUEUE_SIZE")
+    SOCKET_SLOW_CONSUMER_POLICY: str = Field(default="drop", env="SOCKET_SLOW_CONSUMER_POLICY")
+    BROADCAST_QUEUE_SIZE: int = Field(default=10000, env="BROADCAST_QUEUE_SIZE")
+    BROADCAST_MAX_RETRIES: int = Field(default=3, env="BROADCAST_MAX_RETRIES")
+    ADMIN_UPDATE_COALESCE_MS: float = Field(default=0, env="ADMIN_UPDATE_COALESCE_MS")
+    REFERENCE_DUAL_READ: bool = Field(default=True, env="REFERENCE_DUAL_READ")
+    SEARCH_REGEX_FALLBACK: bool = Field(default=False, env="SEARCH_REGEX_FALLBACK")
+    SEARCH_HYBRID_WEIGHT: float = Field(default=0.7, env="SEARCH_HYBRID_WEIGHT")
+    SEARCH_CANDIDATES: int = Field(default=100, env="SEARCH_CANDIDATES")
+    SEARCH_INDEX_TTL_SECONDS: int = Field(default=300, env="SEARCH_INDEX_TTL_SECONDS")
 
     class Config:
         env_file = ".env"
@@ -1,46 +1,382 @@
 # app/core/socket_manager.py
 
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Any, Callable, Dict, Optional
 
+from app.core.broadcast import BroadcastBackend, create_broadcast_backend, serialize_event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CHANNEL = "admin"
+CHAT_CHANNEL_PREFIX = "chat:"
+
+
+# ─────────────────────────────────────────────
+# 🔌 PER-SOCKET OUTBOUND QUEUE
+# ─────────────────────────────────────────────
+class SocketConnection:
+    """
+    Wraps one WebSocket with a bounded outbound queue and its own writer
+    task, so a slow socket never holds up other recipients. A send that
+    fails or exceeds `send_timeout` closes the socket and evicts it.
+    When the queue is full, policy "drop" discards the oldest queued
+    event and "close" disconnects the slow consumer.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_close: Callable[["SocketConnection"], None],
+        queue_size: int,
+        send_timeout: float,
+        policy: str,
+    ):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.policy = policy
+
+        self._on_close = on_close
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._close_task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.dropped = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def send(self, payload: str):
+        if self.closed:
+            return
+
+        if self._queue.full():
+            if self.policy == "close":
+                # Referenced so the task is not garbage-collected mid-close
+                if self._close_task is None:
+                    logger.warning("Closing slow WebSocket consumer (queue full)")
+                    self._close_task = asyncio.create_task(self.close())
+                return
+
+            self._queue.get_nowait()
+            self.dropped += 1
+
+        self._queue.put_nowait(payload)
+
+    async def _run(self):
+        while True:
+            payload = await self._queue.get()
+
+            try:
+                await asyncio.wait_for(self.websocket.send_text(payload), timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"Evicting WebSocket after failed send: {e!r}")
+                await self.close(cancel=False)
+                return
+
+    def detach(self):
+        # Socket already gone (client disconnected); just stop the writer
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+
+    async def close(self, cancel: bool = True):
+        if self.closed:
+            return
+
+        self.closed = True
+        self._on_close(self)
+
+        if cancel and self._task is not None:
+            self._task.cancel()
+
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+
+# ─────────────────────────────────────────────
+# 🚚 BACKGROUND DISPATCHER
+# ─────────────────────────────────────────────
+class BroadcastDispatcher:
+    """
+    Moves publishing off the request path. Events are queued (bounded) and
+    published to the backend by a background task; a failed publish is
+    retried up to `max_retries` times, so within a process every queued
+    event is delivered at least once. Retries waiting out their backoff are
+    tracked and flushed on stop; whatever is still undelivered when stop
+    times out is counted as failed.
+    """
+
+    def __init__(self, backend: BroadcastBackend, queue_size: int, max_retries: int):
+        self.backend = backend
+        self.max_retries = max_retries
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._latencies = deque(maxlen=1000)
+
+        # Retries scheduled with call_later, not yet back in the queue
+        self._pending: Dict[int, tuple] = {}
+        self._retry_ids = itertools.count()
+
+        self.published = 0
+        self.retries = 0
+        self.failed = 0
+
+    async def put(self, channel: str, payload: str):
+        # Only waits when the queue is full (backpressure)
+        await self._queue.put((channel, payload, time.monotonic(), 0))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5):
+        if self._task is None:
+            return
+
+        # Give queued events and pending retries a chance to go out
+        try:
+            await asyncio.wait_for(self._drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            dropped = self._queue.qsize() + len(self._pending)
+            self.failed += dropped
+            logger.warning(f"Dropping {dropped} undelivered broadcasts on shutdown")
+
+        for handle, _ in self._pending.values():
+            handle.cancel()
+        self._pending.clear()
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            channel, payload, queued_at, attempt = await self._queue.get()
+
+            try:
+                await self.backend.publish(channel, payload)
+                self.published += 1
+                self._latencies.append(time.monotonic() - queued_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if attempt < self.max_retries:
+                    # Retry later without holding up the events behind it
+                    self.retries += 1
+                    self._schedule_retry(
+                        0.1 * 2 ** attempt,
+                        (channel, payload, queued_at, attempt + 1),
+                    )
+                else:
+                    self.failed += 1
+                    logger.exception(f"Broadcast on {channel} failed after {attempt + 1} attempts")
+            finally:
+                self._queue.task_done()
+
+    def _schedule_retry(self, delay: float, item: tuple, key: Optional[int] = None):
+        key = next(self._retry_ids) if key is None else key
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, key)
+        self._pending[key] = (handle, item)
+
+    def _requeue(self, key: int):
+        _, item = self._pending.pop(key)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Stay tracked as pending and try again shortly
+            self._schedule_retry(0.1, item, key)
+
+    async def _drain(self):
+        while True:
+            await self._queue.join()
+            if not self._pending:
+                return
+
+            # Skip the remaining backoff: re-queue pending retries now
+            for key, (handle, item) in list(self._pending.items()):
+                try:
+                    self._queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    break
+                handle.cancel()
+                del self._pending[key]
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "pending_retries": len(self._pending),
+            "published": self.published,
+            "retries": self.retries,
+            "failed": self.failed,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_max": percentile(1.0),
+        }
+
+
+# ─────────────────────────────────────────────
+# 📡 CONNECTION MANAGER
+# ─────────────────────────────────────────────
 class ConnectionManager:
 
-    def __init__(self):
-        self.chat_connections: Dict[str, List[WebSocket]] = {}
-        self.admin_connections: List[WebSocket] = []
+    def __init__(self, backend: BroadcastBackend):
+        self.backend = backend
+        self.dispatcher = BroadcastDispatcher(
+            backend,
+            queue_size=settings.BROADCAST_QUEUE_SIZE,
+            max_retries=settings.BROADCAST_MAX_RETRIES,
+        )
+        self.chat_connections: Dict[str, Dict[WebSocket, SocketConnection]] = {}
+        self.admin_connections: Dict[WebSocket, SocketConnection] = {}
+
+        # Latest chat_list_update per chat, waiting for the coalescing window
+        self._admin_updates: Dict[str, dict] = {}
+        self._admin_flush: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.backend.start(self._deliver)
+        self.dispatcher.start()
+
+    async def stop(self):
+        if self._admin_flush is not None:
+            self._admin_flush.cancel()
+            self._admin_flush = None
+        await self._flush_admin_updates()
+
+        await self.dispatcher.stop()
+        await self.backend.stop()
+
+        for connections in [self.admin_connections, *self.chat_connections.values()]:
+            for connection in connections.values():
+                connection.detach()
+
+    def _connection(self, websocket: WebSocket, on_close) -> SocketConnection:
+        connection = SocketConnection(
+            websocket,
+            on_close=on_close,
+            queue_size=settings.SOCKET_QUEUE_SIZE,
+            send_timeout=settings.SOCKET_SEND_TIMEOUT_SECONDS,
+            policy=settings.SOCKET_SLOW_CONSUMER_POLICY,
+        )
+        connection.start()
+        return connection
 
     async def connect_chat(self, chat_id: str, websocket: WebSocket):
         await websocket.accept()
 
         if chat_id not in self.chat_connections:
-            self.chat_connections[chat_id] = []
+            self.chat_connections[chat_id] = {}
 
-        self.chat_connections[chat_id].append(websocket)
+        self.chat_connections[chat_id][websocket] = self._connection(
+            websocket,
+            lambda c: self._remove_chat(chat_id, c.websocket),
+        )
 
     async def connect_admin(self, websocket: WebSocket):
         await websocket.accept()
-        self.admin_connections.append(websocket)
+
+        self.admin_connections[websocket] = self._connection(
+            websocket,
+            lambda c: self.admin_connections.pop(c.websocket, None),
+        )
+
+    def _remove_chat(self, chat_id: str, websocket: WebSocket) -> Optional[SocketConnection]:
+        connections = self.chat_connections.get(chat_id)
+        if connections is None:
+            return None
+
+        connection = connections.pop(websocket, None)
+        if not connections:
+            del self.chat_connections[chat_id]
+
+        return connection
 
     def disconnect_chat(self, chat_id: str, websocket: WebSocket):
-        if chat_id in self.chat_connections:
-            self.chat_connections[chat_id].remove(websocket)
+        connection = self._remove_chat(chat_id, websocket)
+        if connection is not None:
+            connection.detach()
 
     def disconnect_admin(self, websocket: WebSocket):
-        if websocket in self.admin_connections:
-            self.admin_connections.remove(websocket)
+        connection = self.admin_connections.pop(websocket, None)
+        if connection is not None:
+            connection.detach()
 
+    # Serialize once and queue; the dispatcher publishes through the backend
+    # so sockets on every worker receive it
     async def broadcast_chat(self, chat_id: str, message: dict):
+        await self.dispatcher.put(CHAT_CHANNEL_PREFIX + chat_id, serialize_event(message))
 
-        if chat_id not in self.chat_connections:
+    async def broadcast_admin(self, message: dict):
+        window = settings.ADMIN_UPDATE_COALESCE_MS
+
+        if window <= 0 or message.get("type") != "chat_list_update":
+            await self.dispatcher.put(ADMIN_CHANNEL, serialize_event(message))
             return
 
-        for connection in self.chat_connections[chat_id]:
-            await connection.send_json(message)
+        # Keep only the latest state per chat; re-insert so order follows recency
+        self._admin_updates.pop(message["chat_id"], None)
+        self._admin_updates[message["chat_id"]] = message
 
-    async def broadcast_admin(self, message: dict):
+        if self._admin_flush is None:
+            self._admin_flush = asyncio.create_task(self._flush_admin_after(window / 1000))
+
+    async def _flush_admin_after(self, delay: float):
+        await asyncio.sleep(delay)
+        self._admin_flush = None
+        await self._flush_admin_updates()
+
+    async def _flush_admin_updates(self):
+        if not self._admin_updates:
+            return
+
+        updates, self._admin_updates = self._admin_updates, {}
+
+        # One plain chat_list_update per chat (its latest state), the frame
+        # admin clients already handle
+        for update in updates.values():
+            await self.dispatcher.put(ADMIN_CHANNEL, serialize_event(update))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.dispatcher.stats(),
+            "admin_connections": len(self.admin_connections),
+            "chat_connections": sum(len(c) for c in self.chat_connections.values()),
+        }
+
+    # Called by the backend for every event; only enqueues, never waits on a socket
+    async def _deliver(self, channel: str, payload: str):
+
+        if channel == ADMIN_CHANNEL:
+            connections = self.admin_connections
+        elif channel.startswith(CHAT_CHANNEL_PREFIX):
+            connections = self.chat_connections.get(channel[len(CHAT_CHANNEL_PREFIX):], {})
+        else:
+            return
 
-        for connection in self.admin_connections:
-            await connection.send_json(message)
+        for connection in list(connections.values()):
+            connection.send(payload)
 
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(create_broadcast_backend())
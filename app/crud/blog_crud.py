@@ -1,11 +1,24 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
+from app.utils.search import resolve_search, text_index
 from app.models.blog import Blog, BlogCreate, BlogUpdate
+from app.utils.object_ids import lookup_refs, refs_to_db, refs_to_str
+from app.services.search_index_service import search_index, touches_search
 import math
 
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "blogs": [
+        IndexModel([("created_at", -1)]),
+        text_index({"name": 10, "short_desc": 3}),
+    ],
+}
+
+
 # Exception class for blog not found
 class BlogNotFound(Exception):
     pass
@@ -20,32 +33,23 @@ async def get_blogs(
     skip = (page - 1) * per_page
 
     # Build query
-    query: Dict[str, Any] = {}
-    if search_key:
-        query = {
-            "$or": [
-                {"name": {"$regex": search_key, "$options": "i"}}
-            ]
-        }
+    query, sort = await resolve_search(db.blogs, {}, search_key, ["name"])
 
     # Aggregation pipeline with $lookup for doctor and category
     pipeline = [
         {"$match": query},
-        {"$sort": {"created_at": -1}},
+        {"$sort": sort},
         {"$skip": skip},
         {"$limit": per_page},
 
-        # Convert string IDs to ObjectId
-        {"$addFields": {
-            "doctor_obj_id": {"$toObjectId": "$doctor_id"},
-            "category_obj_id": {"$toObjectId": "$category_id"}
-        }},
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("doctor_id", "category_id"),
 
         # Lookup doctor
         {
             "$lookup": {
                 "from": "doctors",
-                "localField": "doctor_obj_id",
+                "localField": "doctor_id",
                 "foreignField": "_id",
                 "as": "doctor"
             }
@@ -56,7 +60,7 @@ async def get_blogs(
         {
             "$lookup": {
                 "from": "categories",
-                "localField": "category_obj_id",
+                "localField": "category_id",
                 "foreignField": "_id",
                 "as": "category"
             }
@@ -70,6 +74,7 @@ async def get_blogs(
 
     # Convert ObjectIds to strings
     for blog in blogs:
+        refs_to_str(blog, "blogs")
         if "_id" in blog:
             blog["_id"] = str(blog["_id"])
         if "doctor" in blog and blog["doctor"]:
@@ -97,8 +102,9 @@ async def create_blog(db: AsyncIOMotorDatabase, blog_create: BlogCreate) -> Blog
     blog_data = blog_create.dict()
     blog_data["created_at"] = datetime.now()
     blog_data["updated_at"] = datetime.now()
-    result = await db.blogs.insert_one(blog_data)
+    result = await db.blogs.insert_one(refs_to_db(dict(blog_data), "blogs"))
     blog_data["_id"] = str(result.inserted_id)
+    await search_index.index_document(db, "blog", blog_data["_id"], blog_data)
     return Blog(**blog_data)
 
 
@@ -106,17 +112,14 @@ async def get_blog(db: AsyncIOMotorDatabase, blog_id: str) -> Blog:
     pipeline = [
         {"$match": {"_id": ObjectId(blog_id)}},
 
-        # Convert string IDs to ObjectId for lookups
-        {"$addFields": {
-            "doctor_obj_id": {"$toObjectId": "$doctor_id"},
-            "category_obj_id": {"$toObjectId": "$category_id"}
-        }},
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("doctor_id", "category_id"),
 
         # Lookup doctor
         {
             "$lookup": {
                 "from": "doctors",
-                "localField": "doctor_obj_id",
+                "localField": "doctor_id",
                 "foreignField": "_id",
                 "as": "doctor"
             }
@@ -127,7 +130,7 @@ async def get_blog(db: AsyncIOMotorDatabase, blog_id: str) -> Blog:
         {
             "$lookup": {
                 "from": "categories",
-                "localField": "category_obj_id",
+                "localField": "category_id",
                 "foreignField": "_id",
                 "as": "category"
             }
@@ -144,6 +147,7 @@ async def get_blog(db: AsyncIOMotorDatabase, blog_id: str) -> Blog:
     blog = blog_data[0]
 
     # Convert ObjectIds to str
+    refs_to_str(blog, "blogs")
     blog["_id"] = str(blog["_id"])
     if "doctor" in blog and blog["doctor"]:
         blog["doctor"]["_id"] = str(blog["doctor"]["_id"])
@@ -163,17 +167,23 @@ async def update_blog(
 
     result = await db.blogs.update_one(
         {"_id": ObjectId(blog_id)},
-        {"$set": update_data}
+        {"$set": refs_to_db(update_data, "blogs")}
     )
 
     if result.matched_count == 0:
         raise BlogNotFound(f"Blog with id {blog_id} not found")
 
-    return await get_blog(db, blog_id)
+    blog = await get_blog(db, blog_id)
+
+    if touches_search("blog", update_data):
+        await search_index.index_document(db, "blog", blog_id, blog.dict())
+
+    return blog
 
 
 async def delete_blog(db: AsyncIOMotorDatabase, blog_id: str):
     result = await db.blogs.delete_one({"_id": ObjectId(blog_id)})
     if result.deleted_count == 1:
+        await search_index.remove_document(db, "blog", blog_id)
         return True
     raise BlogNotFound(f"Blog with id {blog_id} not found")
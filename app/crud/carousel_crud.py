@@ -1,10 +1,21 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
+from app.utils.search import resolve_search, text_index
 from app.models.carousel import Carousel, CarouselCreate, CarouselUpdate
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "carousels": [
+        IndexModel([("created_at", -1)]),
+        text_index({"title": 1}),
+    ],
+}
+
+
 # Exception class for carousel not found
 class CarouselNotFound(Exception):
     pass
@@ -19,18 +30,11 @@ async def get_carousels(
     skip = (page - 1) * per_page
 
     # Build the MongoDB query
-    query = {}
-    if search_key:
-        query = {
-            "$or": [
-                {"title": {"$regex": search_key, "$options": "i"}},  # Case-insensitive search in title
-                # Add more fields here if needed, e.g.:
-                # {"description": {"$regex": search_key, "$options": "i"}}
-            ]
-        }
+    # Text search ranked by relevance
+    query, sort = await resolve_search(db.carousels, {}, search_key, ["title"])
 
     # Fetch paginated carousels
-    carousels_cursor = db.carousels.find(query).sort("created_at", -1).skip(skip).limit(per_page)
+    carousels_cursor = db.carousels.find(query).sort(list(sort.items())).skip(skip).limit(per_page)
     carousels = await carousels_cursor.to_list(length=per_page)
 
     # Convert ObjectId to str
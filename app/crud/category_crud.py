@@ -1,10 +1,22 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
+from app.utils.search import resolve_search, text_index
 from app.models.category import Category, CategoryCreate, CategoryUpdate
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "categories": [
+        IndexModel([("created_at", -1)]),
+        IndexModel([("type", 1), ("created_at", -1)]),
+        text_index({"name": 1}),
+    ],
+}
+
+
 # Exception class for category not found
 class CategoryNotFound(Exception):
     pass
@@ -21,20 +33,14 @@ async def get_categories(
 
     # Build the MongoDB query
     query = {}
-    if search_key:
-        query = {
-            "$or": [
-                {"name": {"$regex": search_key, "$options": "i"}},  # Case-insensitive search in name
-                # Add more fields here if needed, e.g.:
-                # {"description": {"$regex": search_key, "$options": "i"}}
-            ]
-        }
-
     if type:
         query["type"] = type
 
+    # Text search ranked by relevance
+    query, sort = await resolve_search(db.categories, query, search_key, ["name"])
+
     # Fetch paginated categories
-    categories_cursor = db.categories.find(query).sort("created_at", -1).skip(skip).limit(per_page)
+    categories_cursor = db.categories.find(query).sort(list(sort.items())).skip(skip).limit(per_page)
     categories = await categories_cursor.to_list(length=per_page)
 
     # Convert ObjectId to str
@@ -1,11 +1,34 @@
 # app/crud/chat_crud.py
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from datetime import datetime
 from bson import ObjectId
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
+from app.core.config import settings
 from app.models.chat import Chat, ChatCreate, ChatUpdate
+from app.services.chat_session_service import chat_sessions
+from app.services.sender_snapshot_service import get_sender_snapshots
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.object_ids import lookup_refs, ref_match, refs_to_db, refs_to_str
+
+
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "chats": [
+        IndexModel("user_id"),
+        IndexModel("status"),
+        IndexModel([("updated_at", 1), ("_id", 1)]),
+        IndexModel([("status", 1), ("updated_at", -1), ("_id", -1)]),
+        IndexModel([("assigned_admin_id", 1), ("updated_at", -1), ("_id", -1)]),
+        IndexModel(
+            [("updated_at", -1), ("_id", -1)],
+            name="inbox_unread",
+            partialFilterExpression={"unread_admin_count": {"$gt": 0}},
+        ),
+    ],
+}
 
 
 class ChatNotFound(Exception):
@@ -33,7 +56,7 @@ async def create_chat(
         "updated_at": now,
     }
 
-    result = await db.chats.insert_one(data)
+    result = await db.chats.insert_one(refs_to_db(dict(data), "chats"))
     data["_id"] = str(result.inserted_id)
 
     return Chat(**data)
@@ -49,7 +72,7 @@ async def get_chat(
         raise ChatNotFound("Chat not found")
 
     chat["_id"] = str(chat["_id"])
-    return Chat(**chat)
+    return Chat(**refs_to_str(chat, "chats"))
 
 
 async def update_chat(
@@ -69,6 +92,8 @@ async def update_chat(
     if result.matched_count != 1:
         raise ChatNotFound("Chat not found")
 
+    chat_sessions.invalidate(chat_id, update_data)
+
     return await get_chat(db, chat_id)
 
 
@@ -100,24 +125,31 @@ async def list_chats(
     user_id: Optional[str] = None,
 ) -> List[Chat]:
 
+    # Denormalized mode: user_name / user_image_key are stored on the chat
+    if settings.DENORMALIZED_SENDERS:
+        query = {"user_id": ref_match(user_id)} if user_id else {}
+        chats = await db.chats.find(query).sort("updated_at", -1).to_list(length=100)
+
+        for c in chats:
+            c["_id"] = str(c["_id"])
+            refs_to_str(c, "chats")
+
+        return [Chat(**c) for c in chats]
+
     pipeline = []
 
     # Dynamic filter (same logic as before)
     if user_id:
         pipeline.append({
-            "$match": {"user_id": user_id}
+            "$match": {"user_id": ref_match(user_id)}
         })
 
     pipeline.extend([
-        {
-            "$addFields": {
-                "user_obj_id": {"$toObjectId": "$user_id"}
-            }
-        },
+        *lookup_refs("user_id"),
         {
             "$lookup": {
                 "from": "users",
-                "localField": "user_obj_id",
+                "localField": "user_id",
                 "foreignField": "_id",
                 "as": "user"
             }
@@ -142,8 +174,7 @@ async def list_chats(
         },
         {
             "$project": {
-                "user": 0,
-                "user_obj_id": 0
+                "user": 0
             }
         },
         {
@@ -157,12 +188,108 @@ async def list_chats(
 
     for c in chats:
         c["_id"] = str(c["_id"])
+        refs_to_str(c, "chats")
 
     return [Chat(**c) for c in chats]
 
 
 
+async def list_inbox(
+    db: AsyncIOMotorDatabase,
+    status: Optional[str] = None,
+    assigned_admin_id: Optional[str] = None,
+    unread_only: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+) -> Dict[str, Any]:
+
+    # Filters shared by the page and the per-status counts
+    base: Dict[str, Any] = {}
+
+    if assigned_admin_id:
+        base["assigned_admin_id"] = assigned_admin_id
+
+    if unread_only:
+        base["unread_admin_count"] = {"$gt": 0}
+
+    query = dict(base)
+    if status:
+        query["status"] = status
+
+    # Keyset pagination on (updated_at, _id), newest first
+    if cursor:
+        updated_at, _id = decode_cursor(cursor)
+        query["$or"] = [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "_id": {"$lt": _id}},
+        ]
+
+    chats = await (
+        db.chats
+        .find(query)
+        .sort([("updated_at", -1), ("_id", -1)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+
+    has_more = len(chats) > limit
+    chats = chats[:limit]
+
+    for c in chats:
+        refs_to_str(c, "chats")
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(chats[-1]["updated_at"], chats[-1]["_id"])
+
+    # One users query per page (skipped when names are stored on the chat)
+    if not settings.DENORMALIZED_SENDERS:
+        users = await get_sender_snapshots(db, [c["user_id"] for c in chats])
+        for c in chats:
+            user = users.get(c["user_id"])
+            if user:
+                c["user_name"] = user["name"]
+                c["user_image_key"] = user["image_key"]
+
+    for c in chats:
+        c["_id"] = str(c["_id"])
+
+    # Counts per status (and unread) in a single aggregation
+    facets = await db.chats.aggregate([
+        {"$match": base},
+        {
+            "$facet": {
+                "by_status": [
+                    {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+                ],
+                "unread": [
+                    {"$match": {"unread_admin_count": {"$gt": 0}}},
+                    {"$count": "count"}
+                ],
+            }
+        },
+    ]).to_list(length=1)
+
+    by_status = {f["_id"]: f["count"] for f in facets[0]["by_status"]} if facets else {}
+    unread = facets[0]["unread"][0]["count"] if facets and facets[0]["unread"] else 0
+
+    return {
+        "data": [Chat(**c) for c in chats],
+        "pagination": {
+            "limit": limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        },
+        "counts": {
+            "total": sum(by_status.values()),
+            "unread": unread,
+            "by_status": by_status,
+        },
+    }
+
+
 async def delete_all_chats(db: AsyncIOMotorDatabase) -> int:
 
     result = await db.chats.delete_many({})
+    chat_sessions.clear()
     return result.deleted_count
\ No newline at end of file
@@ -1,12 +1,31 @@
 # app/crud/conversation_crud.py
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from datetime import datetime
 from bson import ObjectId
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
+from app.core.config import settings
 from app.models.conversation import Conversation, ResponseConversation
-from app.services.engine_service import generate_embedding
+from app.services.conversation_embedding_service import conversation_embedding_worker
+from app.services.sender_snapshot_service import get_sender_snapshots
+from app.utils.cursor import decode_cursor, encode_cursor
+
+
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "conversations": [
+        IndexModel([("chat_id", 1), ("created_at", 1), ("_id", 1)]),
+        IndexModel("created_at"),
+        IndexModel("sender_id"),
+        # Embedding worker's oldest-first scan; only pending messages are indexed
+        IndexModel(
+            [("embedding_status", 1), ("created_at", 1)],
+            partialFilterExpression={"embedding_status": "pending"},
+        ),
+    ],
+}
 
 
 async def create_conversation(
@@ -22,14 +41,13 @@ async def create_conversation(
 
     now = datetime.utcnow()
 
-    embedding = generate_embedding(content)
-
     data = {
         "chat_id": ObjectId(chat_id),
         "sender_type": sender_type,
         "sender_id": sender_id,
         "content": content,
-        "embedding": embedding,
+        "embedding": None,
+        "embedding_status": "pending",
         "intent_id": intent_id,
         "confidence_score": confidence_score,
         "is_fallback": is_fallback,
@@ -37,6 +55,7 @@ async def create_conversation(
     }
 
     result = await db.conversations.insert_one(data)
+    conversation_embedding_worker.notify()
 
     await db.chats.update_one(
         {"_id": ObjectId(chat_id)},
@@ -55,65 +74,70 @@ async def create_conversation(
     return Conversation(**data)
 
 
-async def list_conversations(db: AsyncIOMotorDatabase, chat_id: str):
-
-    pipeline = [
-        {
-            "$match": {
-                "chat_id": ObjectId(chat_id)
-            }
-        },
-
-        # convert sender_id string → ObjectId
-        {
-            "$addFields": {
-                "sender_object_id": { "$toObjectId": "$sender_id" }
-            }
-        },
-
-        {
-            "$lookup": {
-                "from": "users",
-                "localField": "sender_object_id",
-                "foreignField": "_id",
-                "as": "sender"
-            }
-        },
+async def list_conversations(
+    db: AsyncIOMotorDatabase,
+    chat_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+
+    # Keyset pagination on (chat_id, created_at, _id)
+    query: Dict[str, Any] = {"chat_id": ObjectId(chat_id)}
+    newest_first = after is None
+
+    if before or after:
+        created_at, _id = decode_cursor(before or after)
+        op = "$lt" if before else "$gt"
+        query["$or"] = [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: _id}},
+        ]
+
+    direction = -1 if newest_first else 1
+
+    cursor = (
+        db.conversations
+        .find(query, {"embedding": 0})
+        .sort([("created_at", direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    items = await cursor.to_list(length=limit + 1)
 
-        {
-            "$unwind": {
-                "path": "$sender",
-                "preserveNullAndEmptyArrays": True
-            }
-        },
+    has_more = len(items) > limit
+    items = items[:limit]
 
-        # build sender_name
-        {
-            "$addFields": {
-                "sender_name": {
-                    "$concat": [
-                        { "$ifNull": ["$sender.first_name", ""] },
-                        " ",
-                        { "$ifNull": ["$sender.last_name", ""] }
-                    ]
-                },
-                "sender_image_key": {"$ifNull": ["$sender.image_key", None]}
-            }
-        },
+    # Pages are always returned oldest → newest
+    if newest_first:
+        items.reverse()
 
-        {
-            "$sort": {"created_at": 1}
-        }
-    ]
+    # One users lookup per page instead of one $lookup per message;
+    # rows that already carry a sender snapshot skip it entirely
+    senders = await get_sender_snapshots(
+        db,
+        [m["sender_id"] for m in items if m.get("sender_id") and "sender_name" not in m],
+    )
 
-    cursor = db.conversations.aggregate(pipeline)
-    items = await cursor.to_list(length=1000)
+    pagination = {
+        "limit": limit,
+        "has_more": has_more,
+        "before": encode_cursor(items[0]["created_at"], items[0]["_id"]) if items else None,
+        "after": encode_cursor(items[-1]["created_at"], items[-1]["_id"]) if items else None,
+    }
 
     for m in items:
+        sender = senders.get(m.get("sender_id"))
+        if sender:
+            m["sender_name"] = sender["name"]
+            m["sender_image_key"] = sender["image_key"]
+
         m["_id"] = str(m["_id"])
         m["chat_id"] = str(m["chat_id"])
 
-    return [ResponseConversation(**m) for m in items]
+    return {
+        "data": [ResponseConversation(**m) for m in items],
+        "pagination": pagination,
+    }
 
 
 async def save_conversation(
@@ -125,47 +149,110 @@ async def save_conversation(
     intent_id: Optional[str] = None,
     confidence_score: Optional[float] = None,
     is_fallback: bool = False,
+    chat_update: Optional[Dict[str, Any]] = None,
 ) -> Conversation:
 
-    now = datetime.utcnow()
+    messages = await save_conversations(
+        db,
+        chat_id,
+        [{
+            "sender_type": sender_type,
+            "content": content,
+            "sender_id": sender_id,
+            "intent_id": intent_id,
+            "confidence_score": confidence_score,
+            "is_fallback": is_fallback,
+        }],
+        chat_update=chat_update,
+    )
 
-    embedding = generate_embedding(content)
+    return messages[0]
 
-    data = {
-        "chat_id": ObjectId(chat_id),
-        "sender_type": sender_type,
-        "sender_id": sender_id,
-        "content": content,
-        "embedding": embedding,
-        "intent_id": intent_id,
-        "confidence_score": confidence_score,
-        "is_fallback": is_fallback,
-        "created_at": now,
-    }
 
-    result = await db.conversations.insert_one(data)
+# Persists one exchange (e.g. user message + bot reply) and the chat
+# metadata update together: one ordered insert_many into conversations and
+# one update_one on chats.
+#
+# Consistency: messages are written first, in order, then the chat metadata
+# derived from them. Without transactions a failure in between leaves the
+# messages durable and the chat summary one message behind until the next
+# write. With CHAT_WRITE_TRANSACTIONS (replica set required) both writes
+# commit atomically.
+async def save_conversations(
+    db: AsyncIOMotorDatabase,
+    chat_id: str,
+    messages: List[Dict[str, Any]],
+    chat_update: Optional[Dict[str, Any]] = None,
+) -> List[Conversation]:
+
+    docs = []
+
+    for message in messages:
+        docs.append({
+            "chat_id": ObjectId(chat_id),
+            "sender_type": message["sender_type"],
+            "sender_id": message.get("sender_id"),
+            "content": message["content"],
+            "embedding": None,
+            "embedding_status": "pending",
+            "intent_id": message.get("intent_id"),
+            "confidence_score": message.get("confidence_score"),
+            "is_fallback": message.get("is_fallback", False),
+            "created_at": datetime.utcnow(),
+        })
+
+    # Denormalized mode: store the sender snapshot with the message
+    if settings.DENORMALIZED_SENDERS:
+        senders = await get_sender_snapshots(
+            db,
+            [doc["sender_id"] for doc in docs if doc["sender_id"]],
+        )
+        for doc in docs:
+            sender = senders.get(doc["sender_id"])
+            if sender:
+                doc["sender_name"] = sender["name"]
+                doc["sender_image_key"] = sender["image_key"]
 
     # Update chat metadata
+    last = docs[-1]
+    sender_types = {doc["sender_type"] for doc in docs}
+
     update_data = {
-        "last_message": content,
-        "last_message_at": now,
-        "updated_at": now,
+        "last_message": last["content"],
+        "last_message_at": last["created_at"],
+        "updated_at": last["created_at"],
     }
 
-    if sender_type == "user":
+    if "user" in sender_types:
         update_data["unread_admin_count"] = 1
-    elif sender_type == "admin":
+    if "admin" in sender_types:
         update_data["unread_user_count"] = 1
 
-    await db.chats.update_one(
-        {"_id": ObjectId(chat_id)},
-        {"$set": update_data},
-    )
-
-    data["_id"] = str(result.inserted_id)
-    data["chat_id"] = str(data["chat_id"])
-
-    return Conversation(**data)
+    update_data.update(chat_update or {})
+
+    if settings.CHAT_WRITE_TRANSACTIONS:
+        async with await db.client.start_session() as session:
+            async with session.start_transaction():
+                result = await db.conversations.insert_many(docs, ordered=True, session=session)
+                await db.chats.update_one(
+                    {"_id": ObjectId(chat_id)},
+                    {"$set": update_data},
+                    session=session,
+                )
+    else:
+        result = await db.conversations.insert_many(docs, ordered=True)
+        await db.chats.update_one(
+            {"_id": ObjectId(chat_id)},
+            {"$set": update_data},
+        )
+
+    conversation_embedding_worker.notify()
+
+    for doc, inserted_id in zip(docs, result.inserted_ids):
+        doc["_id"] = str(inserted_id)
+        doc["chat_id"] = str(doc["chat_id"])
+
+    return [Conversation(**doc) for doc in docs]
 
 
 async def delete_all_conversations(db: AsyncIOMotorDatabase) -> int:
@@ -1,10 +1,25 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
+from app.utils.search import resolve_search, text_index
 from app.models.course import Course, CourseCreate, CourseUpdate
+from app.utils.object_ids import lookup_refs, refs_to_db, refs_to_str
+from app.services.search_index_service import search_index, touches_search
 from datetime import datetime, timezone
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "courses": [
+        IndexModel([("created_at", -1)]),
+        IndexModel([("type", 1), ("created_at", -1)]),
+        IndexModel([("is_free", 1), ("created_at", -1)]),
+        text_index({"name": 10, "short_desc": 3, "description": 1}),
+    ],
+}
+
+
 # Exception class for course not found
 class CourseNotFound(Exception):
     pass
@@ -22,12 +37,6 @@ async def get_courses(
 
     # Build query
     query: Dict[str, Any] = {}
-    if search_key:
-        query = {
-            "$or": [
-                {"name": {"$regex": search_key, "$options": "i"}}
-            ]
-        }
 
     if type:
         query["type"] = type
@@ -38,30 +47,24 @@ async def get_courses(
     if is_free is not None:
         query["is_free"] = is_free
 
+    # Text search ranked by relevance
+    query, sort = await resolve_search(db.courses, query, search_key, ["name"])
+
     # Aggregation pipeline with lookups
     pipeline = [
         {"$match": query},
-        {"$sort": {"created_at": -1}},
+        {"$sort": sort},
         {"$skip": skip},
         {"$limit": per_page},
 
-        # Convert string instructor_ids/category_id to ObjectIds
-        {"$addFields": {
-            "instructor_obj_ids": {
-                "$map": {
-                    "input": "$instructor_ids",
-                    "as": "id",
-                    "in": {"$toObjectId": "$$id"}
-                }
-            },
-            "category_obj_id": {"$toObjectId": "$category_id"}
-        }},
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("instructor_ids", "category_id"),
 
         # Lookup instructors
         {
             "$lookup": {
                 "from": "instructors",
-                "localField": "instructor_obj_ids",
+                "localField": "instructor_ids",
                 "foreignField": "_id",
                 "as": "instructors"
             }
@@ -71,57 +74,18 @@ async def get_courses(
         {
             "$lookup": {
                 "from": "categories",
-                "localField": "category_obj_id",
+                "localField": "category_id",
                 "foreignField": "_id",
                 "as": "category"
             }
         },
         {"$unwind": {"path": "$category", "preserveNullAndEmptyArrays": True}},
 
-        # Lookup enrollments (students)
-        {
-            "$lookup": {
-                "from": "enrollments",
-                "let": {"courseId": {"$toString": "$_id"}},
-                "pipeline": [
-                    {"$match": {"$expr": {"$eq": ["$course_id", "$$courseId"]}}},
-                    {"$count": "count"}
-                ],
-                "as": "students"
-            }
-        },
-
-        # Lookup reviews (comments)
-        {
-            "$lookup": {
-                "from": "reviews",
-                "let": {"courseId": {"$toString": "$_id"}},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {
-                                "$and": [
-                                    {"$eq": ["$type", "COURSE"]},
-                                    {"$eq": ["$type_id", "$$courseId"]}
-                                ]
-                            }
-                        }
-                    },
-                    {"$count": "count"}
-                ],
-                "as": "comments"
-            }
-        },
-
-        # Flatten counts (convert arrays to int values)
+        # Materialized counters (see increment_course_counters)
         {
             "$addFields": {
-                "students": {
-                    "$ifNull": [{"$arrayElemAt": ["$students.count", 0]}, 0]
-                },
-                "comments": {
-                    "$ifNull": [{"$arrayElemAt": ["$comments.count", 0]}, 0]
-                }
+                "students": {"$ifNull": ["$students_count", 0]},
+                "comments": {"$ifNull": ["$comments_count", 0]}
             }
         },
     ]
@@ -132,6 +96,7 @@ async def get_courses(
 
     # Convert ObjectIds to strings for frontend
     for course in courses:
+        refs_to_str(course, "courses")
         if "_id" in course:
             course["_id"] = str(course["_id"])
         if "instructors" in course and isinstance(course["instructors"], list):
@@ -202,14 +167,20 @@ async def create_course(db: AsyncIOMotorDatabase, course_create: CourseCreate) -
     else:
         course_data["duration"] = None
 
+    # Counters maintained by enrollment/review crud
+    course_data["students_count"] = 0
+    course_data["comments_count"] = 0
+
     # Timestamps
     course_data["created_at"] = datetime.utcnow()
     course_data["updated_at"] = datetime.utcnow()
 
-    # Insert
-    result = await db.courses.insert_one(course_data)
+    # Insert (references stored as ObjectIds)
+    result = await db.courses.insert_one(refs_to_db(dict(course_data), "courses"))
     course_data["_id"] = str(result.inserted_id)
 
+    await search_index.index_document(db, "course", course_data["_id"], course_data)
+
     return Course(**course_data)
 
 
@@ -217,23 +188,14 @@ async def get_course(db: AsyncIOMotorDatabase, course_id: str) -> Course:
     pipeline = [
         {"$match": {"_id": ObjectId(course_id)}},
 
-        # Convert string IDs to ObjectIds for lookups
-        {"$addFields": {
-            "instructor_obj_ids": {
-                "$map": {
-                    "input": "$instructor_ids",
-                    "as": "id",
-                    "in": {"$toObjectId": "$$id"}
-                }
-            },
-            "category_obj_id": {"$toObjectId": "$category_id"}
-        }},
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("instructor_ids", "category_id"),
 
         # Lookup multiple instructors
         {
             "$lookup": {
                 "from": "instructors",
-                "localField": "instructor_obj_ids",
+                "localField": "instructor_ids",
                 "foreignField": "_id",
                 "as": "instructors"
             }
@@ -243,62 +205,18 @@ async def get_course(db: AsyncIOMotorDatabase, course_id: str) -> Course:
         {
             "$lookup": {
                 "from": "categories",
-                "localField": "category_obj_id",
+                "localField": "category_id",
                 "foreignField": "_id",
                 "as": "category"
             }
         },
         {"$unwind": {"path": "$category", "preserveNullAndEmptyArrays": True}},
 
-        # Lookup enrollments (students)
-        {
-            "$lookup": {
-                "from": "enrollments",
-                "let": {"courseId": {"$toString": "$_id"}},
-                "pipeline": [
-                    {"$match": {"$expr": {"$eq": ["$course_id", "$$courseId"]}}},
-                    {"$count": "count"}
-                ],
-                "as": "students"
-            }
-        },
-
-        # Lookup reviews (comments)
-        {
-            "$lookup": {
-                "from": "reviews",
-                "let": {"courseId": "$_id"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {
-                                "$and": [
-                                    {"$eq": [{"$toLower": "$type"}, "course"]},
-                                    {
-                                        "$or": [
-                                            {"$eq": ["$type_id", "$$courseId"]},
-                                            {"$eq": ["$type_id", {"$toString": "$$courseId"}]}
-                                        ]
-                                    }
-                                ]
-                            }
-                        }
-                    },
-                    {"$count": "count"}
-                ],
-                "as": "comments"
-            }
-        },
-
-        # Flatten counts
+        # Materialized counters (see increment_course_counters)
         {
             "$addFields": {
-                "students": {
-                    "$ifNull": [{"$arrayElemAt": ["$students.count", 0]}, 0]
-                },
-                "comments": {
-                    "$ifNull": [{"$arrayElemAt": ["$comments.count", 0]}, 0]
-                }
+                "students": {"$ifNull": ["$students_count", 0]},
+                "comments": {"$ifNull": ["$comments_count", 0]}
             }
         }
     ]
@@ -312,6 +230,7 @@ async def get_course(db: AsyncIOMotorDatabase, course_id: str) -> Course:
     course = course_data[0]
 
     # Convert ObjectIds to str for response
+    refs_to_str(course, "courses")
     course["_id"] = str(course["_id"])
 
     if "instructors" in course and isinstance(course["instructors"], list):
@@ -391,18 +310,43 @@ async def update_course(
 
     result = await db.courses.update_one(
         {"_id": ObjectId(course_id)},
-        {"$set": update_data}
+        {"$set": refs_to_db(update_data, "courses")}
     )
 
     if result.matched_count == 0:
         raise CourseNotFound(f"Course with id {course_id} not found")
 
     # Return updated object
-    return await get_course(db, course_id)
+    course = await get_course(db, course_id)
+
+    if touches_search("course", update_data):
+        await search_index.index_document(db, "course", course_id, course.dict())
+
+    return course
 
 
 async def delete_course(db: AsyncIOMotorDatabase, course_id: str):
     result = await db.courses.delete_one({"_id": ObjectId(course_id)})
     if result.deleted_count == 1:
+        await search_index.remove_document(db, "course", course_id)
         return True
     raise CourseNotFound(f"Course with id {course_id} not found")
+
+
+async def increment_course_counters(
+    db: AsyncIOMotorDatabase,
+    course_id: str,
+    students: int = 0,
+    comments: int = 0,
+):
+    if not ObjectId.is_valid(course_id):
+        return
+
+    inc = {}
+    if students:
+        inc["students_count"] = students
+    if comments:
+        inc["comments_count"] = comments
+
+    if inc:
+        await db.courses.update_one({"_id": ObjectId(course_id)}, {"$inc": inc})
@@ -1,11 +1,20 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
 from app.models.data_type import DataType, DataTypeCreate, DataTypeUpdate
 import math
 
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "data_types": [
+        IndexModel([("created_at", -1)]),
+    ],
+}
+
+
 # Exception class for data_type not found
 class DataTypeNotFound(Exception):
     pass
@@ -1,10 +1,19 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
 from app.models.doctor import Doctor, DoctorCreate, DoctorUpdate
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "doctors": [
+        IndexModel([("created_at", -1)]),
+    ],
+}
+
+
 # Exception class for doctor not found
 class DoctorNotFound(Exception):
     pass
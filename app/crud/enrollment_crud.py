@@ -1,14 +1,28 @@
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from app.models.enrollment import Enrollment, EnrollmentCreate, EnrollmentUpdate
+from app.crud.course_crud import increment_course_counters
+from app.utils.object_ids import lookup_refs, ref_match, refs_to_db
 import math
 import random
 import string
 
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "enrollments": [
+        IndexModel([("user_id", 1), ("start_at", 1), ("end_at", 1)]),
+        IndexModel([("user_id", 1), ("created_at", -1)]),
+        IndexModel([("created_at", -1)]),
+        IndexModel("course_id"),
+    ],
+}
+
+
 # Exception class for enrollment not found
 class EnrollmentNotFound(Exception):
     pass
@@ -42,7 +56,7 @@ async def get_enrollments(
 
     if role.upper() == "CLIENT":
         # Always filter by the current user
-        query["user_id"] = user_id
+        query["user_id"] = ref_match(user_id)
 
         if type:
             type_upper = type.upper()
@@ -89,19 +103,14 @@ async def get_enrollments(
         {"$skip": skip},
         {"$limit": per_page},
 
-        # Convert string IDs to ObjectId for lookups
-        {
-            "$addFields": {
-                "user_obj_id": {"$toObjectId": "$user_id"},
-                "course_obj_id": {"$toObjectId": "$course_id"},
-            }
-        },
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("user_id", "course_id"),
 
         # Lookup user info
         {
             "$lookup": {
                 "from": "users",
-                "localField": "user_obj_id",
+                "localField": "user_id",
                 "foreignField": "_id",
                 "as": "user",
             }
@@ -112,7 +121,7 @@ async def get_enrollments(
         {
             "$lookup": {
                 "from": "courses",
-                "localField": "course_obj_id",
+                "localField": "course_id",
                 "foreignField": "_id",
                 "as": "course",
             }
@@ -218,9 +227,11 @@ async def create_enrollment(
     enrollment_data["start_at"] = course["start_at"]
     enrollment_data["end_at"] = course["end_at"]
 
-    result = await db.enrollments.insert_one(enrollment_data)
+    result = await db.enrollments.insert_one(refs_to_db(dict(enrollment_data), "enrollments"))
     enrollment_data["_id"] = str(result.inserted_id)
 
+    await increment_course_counters(db, enrollment_create.course_id, students=1)
+
     return Enrollment(**enrollment_data)
 
 
@@ -231,19 +242,14 @@ async def get_enrollment(
     pipeline = [
         {"$match": {"_id": ObjectId(enrollment_id)}},
 
-        # Prepare object ids
-        {
-            "$addFields": {
-                "user_obj_id": {"$toObjectId": "$user_id"},
-                "course_obj_id": {"$toObjectId": "$course_id"},
-            }
-        },
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("user_id", "course_id"),
 
         # Lookup user
         {
             "$lookup": {
                 "from": "users",
-                "localField": "user_obj_id",
+                "localField": "user_id",
                 "foreignField": "_id",
                 "as": "user"
             }
@@ -254,7 +260,7 @@ async def get_enrollment(
         {
             "$lookup": {
                 "from": "courses",
-                "localField": "course_obj_id",
+                "localField": "course_id",
                 "foreignField": "_id",
                 "as": "course"
             }
@@ -320,19 +326,33 @@ async def update_enrollment(
     update_data = {k: v for k, v in enrollment_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.now()
 
-    result = await db.enrollments.update_one(
+    # Previous course_id: a moved enrollment shifts one student between courses
+    before = await db.enrollments.find_one_and_update(
         {"_id": ObjectId(enrollment_id)},
-        {"$set": update_data}
+        {"$set": refs_to_db(update_data, "enrollments")},
+        projection={"course_id": 1},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.matched_count == 0:
+    if before is None:
         raise EnrollmentNotFound(f"Enrollment with id {enrollment_id} not found")
 
+    old_course_id = str(before.get("course_id"))
+    new_course_id = update_data.get("course_id")
+
+    if new_course_id is not None and str(new_course_id) != old_course_id:
+        await increment_course_counters(db, old_course_id, students=-1)
+        await increment_course_counters(db, str(new_course_id), students=1)
+
     return await get_enrollment(db, enrollment_id)
 
 
 async def delete_enrollment(db: AsyncIOMotorDatabase, enrollment_id: str):
-    result = await db.enrollments.delete_one({"_id": ObjectId(enrollment_id)})
-    if result.deleted_count == 1:
+    deleted = await db.enrollments.find_one_and_delete(
+        {"_id": ObjectId(enrollment_id)},
+        projection={"course_id": 1},
+    )
+    if deleted:
+        await increment_course_counters(db, str(deleted.get("course_id")), students=-1)
         return True
     raise EnrollmentNotFound(f"Enrollment with id {enrollment_id} not found")
@@ -1,10 +1,24 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
+from app.utils.search import resolve_search, text_index
 from app.models.faq import FAQ, FAQCreate, FAQUpdate
+from app.utils.object_ids import lookup_refs, ref_match, refs_to_db, refs_to_str
+from app.services.search_index_service import search_index, touches_search
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "faqs": [
+        IndexModel([("created_at", -1)]),
+        IndexModel([("category_id", 1), ("created_at", -1)]),
+        text_index({"question": 5, "answer": 1}),
+    ],
+}
+
+
 # Exception class for faq not found
 class FAQNotFound(Exception):
     pass
@@ -22,34 +36,28 @@ async def get_faqs(
     # Base query
     query: Dict[str, Any] = {}
 
-    # Add search key
-    if search_key:
-        query["$or"] = [
-            {"question": {"$regex": search_key, "$options": "i"}},
-            {"answer": {"$regex": search_key, "$options": "i"}},
-        ]
-
     # Add category filter
     if category_id:
-        query["category_id"] = category_id
+        query["category_id"] = ref_match(category_id)
+
+    # Text search ranked by relevance
+    query, sort = await resolve_search(db.faqs, query, search_key, ["question", "answer"])
 
     # Aggregation pipeline
     pipeline = [
         {"$match": query},
-        {"$sort": {"created_at": -1}},
+        {"$sort": sort},
         {"$skip": skip},
         {"$limit": per_page},
 
-        # Convert category_id to ObjectId
-        {"$addFields": {
-            "category_obj_id": {"$toObjectId": "$category_id"}
-        }},
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("category_id"),
 
         # Lookup category
         {
             "$lookup": {
                 "from": "categories",
-                "localField": "category_obj_id",
+                "localField": "category_id",
                 "foreignField": "_id",
                 "as": "category"
             }
@@ -63,6 +71,7 @@ async def get_faqs(
 
     # Convert ObjectIds to strings
     for faq in faqs:
+        refs_to_str(faq, "faqs")
         if "_id" in faq:
             faq["_id"] = str(faq["_id"])
         if "category" in faq and faq["category"]:
@@ -87,8 +96,9 @@ async def create_faq(db: AsyncIOMotorDatabase, faq_create: FAQCreate) -> FAQ:
     faq_data = faq_create.dict()
     faq_data["created_at"] = datetime.now()
     faq_data["updated_at"] = datetime.now()
-    result = await db.faqs.insert_one(faq_data)
+    result = await db.faqs.insert_one(refs_to_db(dict(faq_data), "faqs"))
     faq_data["_id"] = str(result.inserted_id)
+    await search_index.index_document(db, "faq", faq_data["_id"], faq_data)
     return FAQ(**faq_data)
 
 
@@ -96,16 +106,14 @@ async def get_faq(db: AsyncIOMotorDatabase, faq_id: str) -> FAQ:
     pipeline = [
         {"$match": {"_id": ObjectId(faq_id)}},
 
-        # Convert string IDs to ObjectId for lookup
-        {"$addFields": {
-            "category_obj_id": {"$toObjectId": "$category_id"}
-        }},
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("category_id"),
 
         # Lookup category
         {
             "$lookup": {
                 "from": "categories",
-                "localField": "category_obj_id",
+                "localField": "category_id",
                 "foreignField": "_id",
                 "as": "category"
             }
@@ -123,6 +131,7 @@ async def get_faq(db: AsyncIOMotorDatabase, faq_id: str) -> FAQ:
     faq = faq_data[0]
 
     # Convert ObjectIds to strings
+    refs_to_str(faq, "faqs")
     if "_id" in faq:
         faq["_id"] = str(faq["_id"])
     if "category" in faq and faq["category"]:
@@ -135,14 +144,18 @@ async def get_faq(db: AsyncIOMotorDatabase, faq_id: str) -> FAQ:
 async def update_faq(db: AsyncIOMotorDatabase, faq_id: str, faq_update: FAQUpdate) -> FAQ:
     update_data = {k: v for k, v in faq_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.now()
-    result = await db.faqs.update_one({"_id": ObjectId(faq_id)}, {"$set": update_data})
+    result = await db.faqs.update_one({"_id": ObjectId(faq_id)}, {"$set": refs_to_db(update_data, "faqs")})
     if result.modified_count == 1:
-        return await get_faq(db, faq_id)
+        faq = await get_faq(db, faq_id)
+        if touches_search("faq", update_data):
+            await search_index.index_document(db, "faq", faq_id, faq.dict())
+        return faq
     raise FAQNotFound(f"FAQ with id {faq_id} not found")
 
 
 async def delete_faq(db: AsyncIOMotorDatabase, faq_id: str):
     result = await db.faqs.delete_one({"_id": ObjectId(faq_id)})
     if result.deleted_count == 1:
+        await search_index.remove_document(db, "faq", faq_id)
         return True
     raise FAQNotFound(f"FAQ with id {faq_id} not found")
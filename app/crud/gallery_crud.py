@@ -1,11 +1,20 @@
 from typing import Dict, Any, List, Optional
 from fastapi import Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
 from app.models.gallery import Gallery, GalleryCreate
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "galleries": [
+        IndexModel([("type", 1), ("created_at", -1)]),
+    ],
+}
+
+
 # Exception class for gallery not found
 class GalleryNotFound(Exception):
     pass
@@ -1,10 +1,19 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
 from app.models.instructor import Instructor, InstructorCreate, InstructorUpdate
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "instructors": [
+        IndexModel([("created_at", -1)]),
+    ],
+}
+
+
 # Exception class for instructor not found
 class InstructorNotFound(Exception):
     pass
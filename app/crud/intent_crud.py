@@ -1,5 +1,6 @@
 # app/crud/intent_crud.py
 
+import asyncio
 import math
 import pandas as pd
 import random
@@ -8,12 +9,31 @@ from bson import ObjectId
 from datetime import datetime
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import BulkWriteError
 from bson import ObjectId
 from datetime import datetime
 from io import BytesIO
 
+from app.crud.chat_crud import ChatNotFound
 from app.models.intent import Intent, IntentCreate, IntentUpdate
-from app.services.engine_service import generate_embedding, score_intent
+from app.services.chat_session_service import ChatSession, chat_sessions
+from app.services.engine_service import embed, embed_batch, embed_many
+from app.services.intent_index_service import intent_index
+
+
+UPLOAD_CHUNK_SIZE = 500
+
+
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "intents": [
+        IndexModel("intent", unique=True),
+        IndexModel("created_at"),
+        IndexModel("priority"),
+        IndexModel("is_active"),
+    ],
+}
 
 
 class IntentNotFound(Exception):
@@ -38,10 +58,7 @@ async def create_intent(db: AsyncIOMotorDatabase, intent_create: IntentCreate) -
     if existing:
         raise ValueError("Intent already exists")
 
-    request_embeddings = [
-        generate_embedding(request)
-        for request in intent_create.requests
-    ]
+    request_embeddings = await embed_many(intent_create.requests)
 
     data = intent_create.dict()
     data["intent"] = intent_name
@@ -55,6 +72,8 @@ async def create_intent(db: AsyncIOMotorDatabase, intent_create: IntentCreate) -
     result = await db.intents.insert_one(data)
     data["_id"] = str(result.inserted_id)
 
+    await intent_index.upsert(data)
+
     return Intent(**data)
 
 
@@ -122,10 +141,7 @@ async def update_intent(
     update_data = {k: v for k, v in intent_update.dict().items() if v is not None}
 
     if "requests" in update_data:
-        update_data["request_embeddings"] = [
-            generate_embedding(request)
-            for request in update_data["requests"]
-        ]
+        update_data["request_embeddings"] = await embed_many(update_data["requests"])
 
     update_data["updated_at"] = datetime.utcnow()
 
@@ -137,7 +153,10 @@ async def update_intent(
     if result.matched_count != 1:
         raise IntentNotFound("Intent not found")
 
-    return await get_intent(db, intent_id)
+    intent = await get_intent(db, intent_id)
+    await intent_index.upsert(intent.dict(by_alias=True))
+
+    return intent
 
 
 async def delete_intent(db: AsyncIOMotorDatabase, intent_id: str):
@@ -147,12 +166,15 @@ async def delete_intent(db: AsyncIOMotorDatabase, intent_id: str):
     if result.deleted_count != 1:
         raise IntentNotFound("Intent not found")
 
+    await intent_index.remove(intent_id)
+
     return True
 
 
 async def delete_all_intents(db: AsyncIOMotorDatabase) -> int:
 
     result = await db.intents.delete_many({})
+    await intent_index.clear()
     return result.deleted_count
 
 
@@ -161,19 +183,21 @@ async def upload_intents(
     file_bytes: bytes
 ) -> Dict[str, Any]:
 
-    df = pd.read_excel(BytesIO(file_bytes))
+    df = await asyncio.to_thread(pd.read_excel, BytesIO(file_bytes))
 
     if "intent" not in df.columns:
         raise ValueError("Excel must contain 'intent' column")
 
-    inserted = []
     errors = []
+    rows = []
+    seen = set()
 
-    for index, row in df.iterrows():
+    # 1️⃣ Parse rows (first occurrence of a name wins)
+    for index, row in enumerate(df.to_dict("records")):
         try:
 
             intent_name = str(row["intent"]).strip()
-            if not intent_name:
+            if not intent_name or intent_name in seen:
                 continue
 
             requests = str(row.get("requests", "")).split("|")
@@ -182,32 +206,24 @@ async def upload_intents(
             requests = [e.strip() for e in requests if e.strip()]
             responses = [r.strip() for r in responses if r.strip()]
 
-            request_embeddings = [
-                generate_embedding(request)
-                for request in requests
-            ]
+            now = datetime.utcnow()
 
             intent_data = {
                 "intent": intent_name,
                 "requests": requests,
                 "responses": responses,
-                "request_embeddings": request_embeddings,
                 "priority": int(row.get("priority", 0)),
                 "is_active": parse_bool(row.get("is_active", True)),
                 "is_fallback": parse_bool(row.get("is_fallback", False), False),
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow(),
+                "created_at": now,
+                "updated_at": now,
                 "match_count": 0,
                 "positive_feedback": 0,
                 "negative_feedback": 0,
             }
 
-            existing = await db.intents.find_one({"intent": intent_name})
-            if existing:
-                continue
-
-            await db.intents.insert_one(intent_data)
-            inserted.append(intent_name)
+            seen.add(intent_name)
+            rows.append((index + 1, intent_data))
 
         except Exception as e:
             errors.append({
@@ -215,6 +231,54 @@ async def upload_intents(
                 "error": str(e)
             })
 
+    # 2️⃣ Skip intents that already exist (one $in query)
+    existing = await db.intents.find(
+        {"intent": {"$in": list(seen)}},
+        {"intent": 1},
+    ).to_list(None)
+    existing_names = {doc["intent"] for doc in existing}
+
+    rows = [(n, data) for n, data in rows if data["intent"] not in existing_names]
+
+    # 3️⃣ Embed every request string of the sheet in one batched encode
+    texts = list(dict.fromkeys(
+        request for _, data in rows for request in data["requests"]
+    ))
+    vectors = dict(zip(texts, await embed_batch(texts)))
+
+    for _, data in rows:
+        data["request_embeddings"] = [vectors[r] for r in data["requests"]]
+
+    # 4️⃣ Chunked unordered inserts, mapping write errors back to rows
+    inserted = []
+
+    for start in range(0, len(rows), UPLOAD_CHUNK_SIZE):
+        chunk = rows[start:start + UPLOAD_CHUNK_SIZE]
+        failed = set()
+
+        try:
+            await db.intents.insert_many(
+                [data for _, data in chunk],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                row_number, _ = chunk[write_error["index"]]
+                failed.add(write_error["index"])
+                errors.append({
+                    "row": row_number,
+                    "error": write_error.get("errmsg", "Insert failed")
+                })
+
+        inserted.extend(
+            data["intent"]
+            for i, (_, data) in enumerate(chunk)
+            if i not in failed
+        )
+
+    if inserted:
+        intent_index.invalidate()
+
     return {
         "inserted_count": len(inserted),
         "inserted_intents": inserted,
@@ -222,35 +286,34 @@ async def upload_intents(
     }
 
 
-async def generate_reply(db, message: str, chat_id: str):
+async def generate_reply(db, message: str, chat_id: str, session: Optional[ChatSession] = None):
 
     message_clean = message.lower().strip()
 
-    chat = await db.chats.find_one({"_id": ObjectId(chat_id)})
-    intents = await db.intents.find({"is_active": True}).to_list(None)
+    if session is None:
+        session = await chat_sessions.get(db, chat_id)
+        if session is None:
+            raise ChatNotFound("Chat not found")
 
-    user_embedding = generate_embedding(message_clean)
+    await intent_index.ensure_loaded(db)
 
-    best_intent = None
-    best_score = 0.0
+    user_embedding = await embed(message_clean)
 
     # ─────────────────────────────
     # 🔥 CONTEXT CONTINUATION LOGIC
     # ─────────────────────────────
     short_message = len(message_clean.split()) <= 3
 
-    for intent in intents:
+    # If short reply like "yes", focus on last intent
+    only_intent_id = None
+    if short_message and session.current_intent_id:
+        only_intent_id = session.current_intent_id
 
-        # If short reply like "yes", focus on last intent
-        if short_message and chat.get("current_intent_id"):
-            if str(intent["_id"]) != chat["current_intent_id"]:
-                continue
-
-        score = score_intent(user_embedding, message_clean, intent)
-
-        if score > best_score:
-            best_score = score
-            best_intent = intent
+    best_intent, best_score = intent_index.match(
+        user_embedding,
+        message_clean,
+        only_intent_id,
+    )
 
     confidence = round(best_score, 3)
 
@@ -259,15 +322,10 @@ async def generate_reply(db, message: str, chat_id: str):
     # ─────────────────────────────
     if best_intent and confidence >= 0.75:
 
-        await db.chats.update_one(
-            {"_id": ObjectId(chat_id)},
-            {
-                "$set": {
-                    "current_intent_id": str(best_intent["_id"]),
-                    "failure_count": 0,
-                    "updated_at": datetime.utcnow()
-                }
-            }
+        chat_sessions.update(
+            session,
+            current_intent_id=str(best_intent["_id"]),
+            failure_count=0,
         )
 
         return {
@@ -286,12 +344,9 @@ async def generate_reply(db, message: str, chat_id: str):
         }
 
     # 🔥 Escalation after repeated failure
-    failure_count = chat.get("failure_count", 0) + 1
+    failure_count = session.failure_count + 1
 
-    await db.chats.update_one(
-        {"_id": ObjectId(chat_id)},
-        {"$set": {"failure_count": failure_count}}
-    )
+    chat_sessions.update(session, failure_count=failure_count)
 
     if failure_count >= 2:
         return {
@@ -1,11 +1,22 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
+from app.utils.search import resolve_search, text_index
 from app.models.message import Message, MessageCreate, MessageUpdate
 # from pymongo import DESCENDING
 import math
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "messages": [
+        IndexModel([("created_at", -1)]),
+        text_index({"name": 1}),
+    ],
+}
+
+
 # Exception class for message not found
 class MessageNotFound(Exception):
     pass
@@ -20,18 +31,11 @@ async def get_messages(
     skip = (page - 1) * per_page
 
     # Build the MongoDB query
-    query = {}
-    if search_key:
-        query = {
-            "$or": [
-                {"name": {"$regex": search_key, "$options": "i"}},  # Case-insensitive search in title
-                # Add more fields here if needed, e.g.:
-                # {"description": {"$regex": search_key, "$options": "i"}}
-            ]
-        }
+    # Text search ranked by relevance
+    query, sort = await resolve_search(db.messages, {}, search_key, ["name"])
 
     # Fetch paginated messages
-    messages_cursor = db.messages.find(query).sort("created_at", -1).skip(skip).limit(per_page)
+    messages_cursor = db.messages.find(query).sort(list(sort.items())).skip(skip).limit(per_page)
     messages = await messages_cursor.to_list(length=per_page)
 
     # Convert ObjectId to str
@@ -1,12 +1,21 @@
 import math
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from datetime import datetime
 from bson import ObjectId
 
 from app.models.option import Option, OptionCreate, OptionUpdate
 
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "options": [
+        IndexModel([("type", 1), ("created_at", -1)]),
+    ],
+}
+
+
 class OptionNotFound(Exception):
     pass
 
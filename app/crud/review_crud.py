@@ -1,10 +1,22 @@
 import math
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
 from app.models.review import Review, ReviewCreate, ReviewReplay
 from app.models.user import User
+from app.crud.course_crud import increment_course_counters
+from app.utils.object_ids import lookup_refs, ref_match, refs_to_db, refs_to_str, to_ref
+
+
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "reviews": [
+        IndexModel([("type", 1), ("type_id", 1), ("created_at", -1)]),
+        IndexModel([("user_id", 1), ("type", 1), ("type_id", 1)]),
+    ],
+}
 
 
 # Exception class for review not found
@@ -23,31 +35,20 @@ async def get_reviews(
 
     query: Dict[str, Any] = {"type": type}
     if type_id:
-        query["type_id"] = type_id
+        query["type_id"] = ref_match(type_id)
 
     pipeline = [
         {"$match": query},
         {"$sort": {"created_at": -1}},
         {"$skip": skip},
         {"$limit": per_page},
-        {
-            "$addFields": {
-                "user_obj_id": {"$toObjectId": "$user_id"},
-                "replayer_obj_id": {
-                    "$cond": {
-                        "if": {"$ifNull": ["$replayer_id", False]},
-                        "then": {"$toObjectId": "$replayer_id"},
-                        "else": None
-                    }
-                },
-                "type_obj_id": {"$toObjectId": "$type_id"}
-            }
-        },
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("user_id", "replayer_id", "type_id"),
         # Lookup user
         {
             "$lookup": {
                 "from": "users",
-                "localField": "user_obj_id",
+                "localField": "user_id",
                 "foreignField": "_id",
                 "as": "user"
             }
@@ -57,7 +58,7 @@ async def get_reviews(
         {
             "$lookup": {
                 "from": "users",
-                "localField": "replayer_obj_id",
+                "localField": "replayer_id",
                 "foreignField": "_id",
                 "as": "replayer"
             }
@@ -67,7 +68,7 @@ async def get_reviews(
         {
             "$lookup": {
                 "from": "courses",
-                "localField": "type_obj_id",
+                "localField": "type_id",
                 "foreignField": "_id",
                 "as": "course"
             }
@@ -77,7 +78,7 @@ async def get_reviews(
         {
             "$lookup": {
                 "from": "blogs",
-                "localField": "type_obj_id",
+                "localField": "type_id",
                 "foreignField": "_id",
                 "as": "blog"
             }
@@ -130,6 +131,7 @@ async def get_reviews(
 
     # Convert ObjectIds to string
     for review in reviews:
+        refs_to_str(review, "reviews")
         if "_id" in review:
             review["_id"] = str(review["_id"])
         if review.get("user") and "_id" in review["user"]:
@@ -166,9 +168,9 @@ async def create_review(
 
     # Step 1: check if review already exists for (user_id, type, type_id)
     existing = await db.reviews.find_one({
-        "user_id": user_id,
+        "user_id": ref_match(user_id),
         "type": review_create.type,
-        "type_id": review_create.type_id,
+        "type_id": ref_match(review_create.type_id),
     })
 
     if existing:
@@ -176,9 +178,13 @@ async def create_review(
         await db.reviews.delete_one({"_id": existing["_id"]})
 
     # Step 3: insert new review
-    result = await db.reviews.insert_one(review_data)
+    result = await db.reviews.insert_one(refs_to_db(dict(review_data), "reviews"))
     review_data["_id"] = str(result.inserted_id)
 
+    # Replacing a review leaves the course's comment count unchanged
+    if not existing and review_create.type.upper() == "COURSE":
+        await increment_course_counters(db, review_create.type_id, comments=1)
+
     # Step 4: fetch user info and embed in response
     user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
     if user_doc:
@@ -226,26 +232,14 @@ async def get_review(
     pipeline = [
         {"$match": {"_id": ObjectId(review_id)}},
 
-        # Prepare object ids
-        {
-            "$addFields": {
-                "user_obj_id": {"$toObjectId": "$user_id"},
-                "replayer_obj_id": {
-                    "$cond": {
-                        "if": {"$ifNull": ["$replayer_id", False]},
-                        "then": {"$toObjectId": "$replayer_id"},
-                        "else": None
-                    }
-                },
-                "type_obj_id": {"$toObjectId": "$type_id"}
-            }
-        },
+        # Legacy string refs (dual-read while the ObjectId migration runs)
+        *lookup_refs("user_id", "replayer_id", "type_id"),
 
         # Lookup user
         {
             "$lookup": {
                 "from": "users",
-                "localField": "user_obj_id",
+                "localField": "user_id",
                 "foreignField": "_id",
                 "as": "user"
             }
@@ -256,7 +250,7 @@ async def get_review(
         {
             "$lookup": {
                 "from": "users",
-                "localField": "replayer_obj_id",
+                "localField": "replayer_id",
                 "foreignField": "_id",
                 "as": "replayer"
             }
@@ -267,7 +261,7 @@ async def get_review(
         {
             "$lookup": {
                 "from": "courses",
-                "localField": "type_obj_id",
+                "localField": "type_id",
                 "foreignField": "_id",
                 "as": "course"
             }
@@ -278,7 +272,7 @@ async def get_review(
         {
             "$lookup": {
                 "from": "blogs",
-                "localField": "type_obj_id",
+                "localField": "type_id",
                 "foreignField": "_id",
                 "as": "blog"
             }
@@ -336,6 +330,7 @@ async def get_review(
     review = review_data[0]
 
     # Convert ObjectIds to string
+    refs_to_str(review, "reviews")
     if "_id" in review:
         review["_id"] = str(review["_id"])
     if review.get("user") and "_id" in review["user"]:
@@ -354,8 +349,13 @@ async def delete_review(
     db: AsyncIOMotorDatabase, 
     review_id: str,
 ):
-    result = await db.reviews.delete_one({"_id": ObjectId(review_id)})
-    if result.deleted_count == 1:
+    deleted = await db.reviews.find_one_and_delete(
+        {"_id": ObjectId(review_id)},
+        projection={"type": 1, "type_id": 1},
+    )
+    if deleted:
+        if (deleted.get("type") or "").upper() == "COURSE":
+            await increment_course_counters(db, str(deleted.get("type_id")), comments=-1)
         return True
     raise ReviewNotFound(f"Review with id {review_id} not found")
 
@@ -366,7 +366,7 @@ async def get_summary(
     type_id: str
 ):
     pipeline = [
-        {"$match": {"type": type, "type_id": type_id}},
+        {"$match": {"type": type, "type_id": ref_match(type_id)}},
         {
             "$group": {
                 "_id": None,
@@ -444,7 +444,7 @@ async def replay_review(
     review_replay: ReviewReplay,
 ) -> Review:
     update_data = {k: v for k, v in review_replay.dict().items() if v is not None}
-    update_data["replayer_id"] = replayer_id
+    update_data["replayer_id"] = to_ref(replayer_id)
     update_data["replay_at"] = datetime.now()
     result = await db.reviews.update_one({"_id": ObjectId(review_id)}, {"$set": update_data})
     if result.modified_count == 1:
@@ -496,6 +496,7 @@ async def react_review(
     if result.modified_count == 1:
         return await get_review(db, review_id)
 
-    return Review(**review)
+    review["_id"] = str(review["_id"])
+    return Review(**refs_to_str(review, "reviews"))
 
 
@@ -1,11 +1,20 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
 from app.models.testimonial import Testimonial, TestimonialCreate, TestimonialUpdate
 import math
 
 
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "testimonials": [
+        IndexModel([("created_at", -1)]),
+    ],
+}
+
+
 # Exception class for testimonial not found
 class TestimonialNotFound(Exception):
     pass
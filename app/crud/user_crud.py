@@ -1,11 +1,25 @@
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
 from bson import ObjectId
 from datetime import datetime
+from app.utils.search import resolve_search, text_index
 from app.models.user import User, UserCreate, UserUpdate
 import math
 
 from app.utils.auth import hash_password
+from app.services.sender_snapshot_service import user_profile_changed
+
+
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    "users": [
+        IndexModel([("role", 1), ("email", 1)]),
+        IndexModel([("role", 1), ("phone_number", 1)]),
+        IndexModel([("role", 1), ("created_at", -1)]),
+        text_index({"first_name": 5, "last_name": 5, "email": 3, "phone_number": 1}),
+    ],
+}
 
 
 # Exception class for user not found
@@ -25,16 +39,16 @@ async def get_users(
     # Base query → filter by role
     query: Dict[str, Any] = {"role": role}
 
-    # Add search filter if provided
-    if search_key:
-        query["$or"] = [
-            {"name": {"$regex": search_key, "$options": "i"}},
-            {"email": {"$regex": search_key, "$options": "i"}},
-            {"phone_number": {"$regex": search_key, "$options": "i"}},
-        ]
+    # Text search ranked by relevance
+    query, sort = await resolve_search(
+        db.users,
+        query,
+        search_key,
+        ["first_name", "last_name", "email", "phone_number"],
+    )
 
     # Fetch paginated users
-    users_cursor = db.users.find(query).sort("created_at", -1).skip(skip).limit(per_page)
+    users_cursor = db.users.find(query).sort(list(sort.items())).skip(skip).limit(per_page)
     users = await users_cursor.to_list(length=per_page)
 
     # Convert ObjectId → str
@@ -88,7 +102,9 @@ async def update_user(db: AsyncIOMotorDatabase, user_id: str, user_update: UserU
     update_data["updated_at"] = datetime.now()
     result = await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
     if result.modified_count == 1:
-        return await get_user(db, user_id)
+        user = await get_user(db, user_id)
+        user_profile_changed(db, user_id, user.dict())
+        return user
     raise UserNotFound(f"User with id {user_id} not found")
 
 
@@ -11,12 +11,18 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from starlette.middleware.cors import CORSMiddleware
 
-from app.services.engine_service import load_model
+from app.services.engine_service import shutdown_embedding_service, start_warm_up
+from app.services.conversation_embedding_service import conversation_embedding_worker
+from app.services.intent_index_service import intent_index
+from app.services.search_index_service import search_index
+from app.services.chat_session_service import chat_sessions
 from app.core.config import settings
+from app.core.socket_manager import manager
+from app.services.index_service import index_report, start_index_build, stop_index_build
 from app.utils.database import (
     connect_to_mongo,
     close_mongo_connection,
-    create_indexes,
+    get_database,
 )
 
 # Import all routers
@@ -42,6 +48,7 @@ from app.routes.chat_routes import router as chat_router
 from app.routes.conversation_routes import router as conversation_router
 from app.routes.option_routes import router as option_router
 from app.routes.socket_routes import router as socket_router
+from app.routes.search_routes import router as search_router
 
 # ---------------------------------------------------
 # Logging Configuration
@@ -65,11 +72,27 @@ async def lifespan(app: FastAPI):
     # Connect MongoDB
     await connect_to_mongo()
 
-    # Ensure indexes
-    await create_indexes()
+    # Ensure indexes declared by the crud modules (background, idempotent)
+    start_index_build()
 
-    # Load embedding model
-    load_model()
+    # Embedding model loads lazily on first use; optionally warm it up now
+    if settings.EMBEDDING_WARMUP:
+        start_warm_up()
+
+    # Build intent index (reloads persisted ANN centroids)
+    await intent_index.ensure_loaded(await get_database())
+
+    # Course / blog / FAQ vectors for /search
+    await search_index.ensure_loaded(await get_database())
+
+    # Embed conversations in the background
+    conversation_embedding_worker.start()
+
+    # Write-behind flusher for per-chat bot state
+    chat_sessions.start()
+
+    # Socket fan-out across workers
+    await manager.start()
 
     logger.info("✅ Application startup completed.")
 
@@ -78,6 +101,12 @@ async def lifespan(app: FastAPI):
     # Shutdown section
     logger.info("🛑 Shutting down application...")
 
+    await stop_index_build()
+    await manager.stop()
+    await conversation_embedding_worker.stop()
+    await chat_sessions.stop()
+    shutdown_embedding_service()
+
     await close_mongo_connection()
 
     logger.info("✅ Shutdown completed.")
@@ -129,6 +158,11 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/indexes")
+async def index_health():
+    return await index_report(await get_database())
+
+
 # ---------------------------------------------------
 # Root Endpoint
 # ---------------------------------------------------
@@ -163,4 +197,5 @@ app.include_router(intent_router, prefix="/intents", tags=["Intent"])
 app.include_router(chat_router, prefix="/chats", tags=["Chat"])
 app.include_router(conversation_router, prefix="/conversations", tags=["Conversation"])
 app.include_router(option_router, prefix="/options", tags=["Option"])
-app.include_router(socket_router, tags=["Socket"])
\ No newline at end of file
+app.include_router(socket_router, tags=["Socket"])
+app.include_router(search_router, prefix="/search", tags=["Search"])
\ No newline at end of file
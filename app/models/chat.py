@@ -1,7 +1,7 @@
 # app/models/chat.py
 
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 from app.models.custom_types import PydanticObjectId
 
@@ -53,4 +53,22 @@ class ChatUpdate(BaseModel):
     status: Optional[str] = None
     source: Optional[str] = None
     assigned_admin_id: Optional[str] = None
-    is_bot_enabled: Optional[bool] = None
\ No newline at end of file
+    is_bot_enabled: Optional[bool] = None
+
+
+class InboxCursor(BaseModel):
+    limit: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
+class InboxCounts(BaseModel):
+    total: int
+    unread: int
+    by_status: Dict[str, int]
+
+
+class ChatInbox(BaseModel):
+    data: List[Chat]
+    pagination: InboxCursor
+    counts: InboxCounts
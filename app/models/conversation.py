@@ -1,13 +1,14 @@
 # app/models/conversation.py
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Literal
+from typing import Optional, Dict, List, Literal
 from datetime import datetime
 from app.models.custom_types import PydanticObjectId
 
 
 SenderType = Literal["user", "bot", "admin", "system"]
 MessageType = Literal["text", "image", "file", "system"]
+EmbeddingStatus = Literal["pending", "done"]
 
 
 class Conversation(BaseModel):
@@ -17,11 +18,14 @@ class Conversation(BaseModel):
 
     sender_type: SenderType
     sender_id: Optional[str] = None
+    sender_name: Optional[str] = None
+    sender_image_key: Optional[str] = None
 
     message_type: MessageType = "text"
     content: str
 
     embedding: Optional[list[float]] = None
+    embedding_status: Optional[EmbeddingStatus] = None
 
     intent_id: Optional[str] = None
     confidence_score: Optional[float] = None
@@ -58,6 +62,18 @@ class ResponseConversation(BaseModel):
         json_encoders = {PydanticObjectId: str}
 
 
+class ConversationCursor(BaseModel):
+    limit: int
+    has_more: bool
+    before: Optional[str] = None
+    after: Optional[str] = None
+
+
+class ConversationPage(BaseModel):
+    data: List[ResponseConversation]
+    pagination: ConversationCursor
+
+
 class ConversationCreate(BaseModel):
     message: str
     chat_id: Optional[str] = None
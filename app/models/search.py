@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Literal
+
+SearchType = Literal["course", "blog", "faq"]
+
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: str
+    title: str
+    score: float
+    semantic_score: float
+    keyword_score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchHit]
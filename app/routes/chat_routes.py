@@ -2,15 +2,16 @@
 
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.models.chat import Chat, ChatCreate
+from app.models.chat import Chat, ChatCreate, ChatInbox, ChatStatus
 from app.crud.chat_crud import (
     create_chat,
     delete_all_chats,
     get_chat,
     list_chats,
+    list_inbox,
     ChatNotFound,
 )
 from app.utils.database import get_database
@@ -42,6 +43,21 @@ async def get_chats(
     return await list_chats(db, user_id)
 
 
+@router.get("/inbox", response_model=ChatInbox)
+async def get_inbox(
+    status: Optional[ChatStatus] = None,
+    assigned_admin_id: Optional[str] = None,
+    unread_only: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+):
+    try:
+        return await list_inbox(db, status, assigned_admin_id, unread_only, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("", response_model=Chat)
 async def create_chat(
     chat_create: ChatCreate,
@@ -1,19 +1,25 @@
 # app/routes/conversation_routes.py
 
 from datetime import datetime
+from typing import Optional
 
-from fastapi.encoders import jsonable_encoder
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
 
 from app.crud.intent_crud import generate_reply
-from app.models.conversation import ResponseConversation, ConversationCreate, ConversationUpdate
-from app.crud.conversation_crud import delete_all_conversations, list_conversations, save_conversation
+from app.models.conversation import ConversationPage, ConversationCreate, ConversationUpdate
+from app.crud.conversation_crud import (
+    delete_all_conversations,
+    list_conversations,
+    save_conversation,
+    save_conversations,
+)
 from app.crud.chat_crud import create_chat, get_chat
 from app.models.chat import ChatCreate
 from app.utils.database import get_database
 from app.core.socket_manager import manager
+from app.services.chat_session_service import chat_sessions
+from app.services.sender_snapshot_service import get_sender_snapshots
 
 router = APIRouter()
 
@@ -44,68 +50,60 @@ async def send_message(
     # 1️⃣ Create chat if needed
     chat_id = conversation_data.chat_id
 
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    if not chat_id:
+        sender = (await get_sender_snapshots(db, [user_id])).get(user_id)
 
-    name = user.get("first_name") if user else None
-    image_key = user.get("image_key") if user else None
+        name = sender["name"] if sender else None
+        image_key = sender["image_key"] if sender else None
 
-    if not chat_id:
         chat = await create_chat(db, ChatCreate(user_id=user_id,user_name=name,user_image_key=image_key))
         chat_id = str(chat.id)
+    else:
+        chat = await get_chat(db, chat_id)
 
-    chat = await get_chat(db, chat_id)
+    # Hot bot state for this chat, loaded once and passed down
+    session = await chat_sessions.get(db, chat_id, chat)
 
-    # 2️⃣ Save user conversation
-    user_msg = await save_conversation(
-        db=db,
-        chat_id=chat_id,
-        sender_type="user",
-        content=conversation_data.message,
-        sender_id=user_id,
-    )
-
-    await manager.broadcast_chat(
-        chat_id,
-        jsonable_encoder({
-            "type": "new_message",
-            "message": user_msg.dict()
-        })
-    )
-    await manager.broadcast_admin(
-        jsonable_encoder({
-            "type": "chat_list_update",
-            "chat_id": chat_id,
-            "last_message": conversation_data.message,
-            "sender_type": "user",
-            "last_message_at": user_msg.created_at
-        })
-    )
+    user_message = {
+        "sender_type": "user",
+        "content": conversation_data.message,
+        "sender_id": user_id,
+    }
 
-    # 3️⃣ If bot disabled → escalate directly
-    if not chat.is_bot_enabled:
-        await db.chats.update_one(
-            {"_id": ObjectId(chat_id)},
-            {
-                "$set": {
-                    "status": "pending_admin",
-                    "source": "human",
-                    "escalated_at": datetime.utcnow()
-                }
-            }
+    # 2️⃣ If bot disabled → save and escalate directly
+    if not session.is_bot_enabled:
+        user_msg = await save_conversation(
+            db=db,
+            chat_id=chat_id,
+            **user_message,
+            chat_update={
+                "status": "pending_admin",
+                "source": "human",
+                "escalated_at": datetime.utcnow()
+            },
         )
 
+        await broadcast_user_message(chat_id, user_msg)
+
         return {
             "chat_id": chat_id,
             "status": "pending_admin",
             "message": "Your message has been sent to support."
         }
 
-    # 4️⃣ Generate intelligent reply
-    reply_data = await generate_reply(
-        db,
-        conversation_data.message,
-        chat_id
-    )
+    # 3️⃣ Generate intelligent reply
+    try:
+        reply_data = await generate_reply(
+            db,
+            conversation_data.message,
+            chat_id,
+            session,
+        )
+    except Exception:
+        # Never lose the user's message: persist it before surfacing the error
+        user_msg = await save_conversation(db=db, chat_id=chat_id, **user_message)
+        await broadcast_user_message(chat_id, user_msg)
+        raise
 
     decision = reply_data["decision"]
 
@@ -126,34 +124,42 @@ async def send_message(
     #         "confidence": reply_data["confidence"],
     #         "bot_message": bot_msg,
     #     }
-    
-    # Bot confident reply → save conversation
+
+    # 4️⃣ Persist the exchange in one batched write
+    # Bot confident reply → save user message + bot reply together
     if decision == "bot":
 
-        bot_msg = await save_conversation(
-            db=db,
-            chat_id=chat_id,
-            sender_type="bot",
-            content=reply_data["message"],
-            intent_id=reply_data["intent_id"],
-            confidence_score=reply_data["confidence"],
+        user_msg, bot_msg = await save_conversations(
+            db,
+            chat_id,
+            [
+                user_message,
+                {
+                    "sender_type": "bot",
+                    "content": reply_data["message"],
+                    "intent_id": reply_data["intent_id"],
+                    "confidence_score": reply_data["confidence"],
+                },
+            ],
         )
 
+        await broadcast_user_message(chat_id, user_msg)
+
         await manager.broadcast_chat(
             chat_id,
-            jsonable_encoder({
+            {
                 "type": "bot_reply",
-                "message": bot_msg.dict()
-            })
+                "message": bot_msg.dict(exclude={"embedding"})
+            }
         )
         await manager.broadcast_admin(
-            jsonable_encoder({
+            {
                 "type": "chat_list_update",
                 "chat_id": chat_id,
                 "last_message": reply_data["message"],
                 "sender_type": "bot",
                 "last_message_at": bot_msg.created_at
-            })
+            }
         )
 
         return {
@@ -164,9 +170,12 @@ async def send_message(
         }
 
 
-    # Clarification → DO NOT SAVE
+    # Clarification → DO NOT SAVE the bot reply
     if decision == "clarification":
 
+        user_msg = await save_conversation(db=db, chat_id=chat_id, **user_message)
+        await broadcast_user_message(chat_id, user_msg)
+
         return {
             "chat_id": chat_id,
             "status": "clarification",
@@ -175,10 +184,13 @@ async def send_message(
         }
 
     # Escalate
-    await db.chats.update_one(
-        {"_id": ObjectId(chat_id)},
-        {"$set": {"status": "pending_admin"}}
+    user_msg = await save_conversation(
+        db=db,
+        chat_id=chat_id,
+        **user_message,
+        chat_update={"status": "pending_admin"},
     )
+    await broadcast_user_message(chat_id, user_msg)
 
     return {
         "chat_id": chat_id,
@@ -188,6 +200,26 @@ async def send_message(
     }
 
 
+async def broadcast_user_message(chat_id: str, user_msg):
+
+    await manager.broadcast_chat(
+        chat_id,
+        {
+            "type": "new_message",
+            "message": user_msg.dict(exclude={"embedding"})
+        }
+    )
+    await manager.broadcast_admin(
+        {
+            "type": "chat_list_update",
+            "chat_id": chat_id,
+            "last_message": user_msg.content,
+            "sender_type": "user",
+            "last_message_at": user_msg.created_at
+        }
+    )
+
+
 @router.post("/reply")
 async def replay_conversation(
     conversation_data: ConversationUpdate,
@@ -205,34 +237,27 @@ async def replay_conversation(
         sender_type="admin",
         content=conversation_data.message,
         sender_id=admin_id,
+        chat_update={
+            "status": "open",
+            "source": "human",
+            "assigned_admin_id": admin_id,
+        },
     )
 
     await manager.broadcast_chat(
         conversation_data.chat_id,
-        jsonable_encoder({
+        {
             "type": "admin_reply",
             "message": admin_msg
-        })
+        }
     )
     await manager.broadcast_admin(
-        jsonable_encoder({
+        {
             "type": "chat_list_update",
             "chat_id": conversation_data.chat_id,
             "last_message": conversation_data.message,
             "sender_type": "admin",
             "last_message_at": admin_msg.created_at
-        })
-    )
-
-    await db.chats.update_one(
-        {"_id": ObjectId(conversation_data.chat_id)},
-        {
-            "$set": {
-                "status": "open",
-                "source": "human",
-                "assigned_admin_id": admin_id,
-                "updated_at": datetime.utcnow()
-            }
         }
     )
 
@@ -242,9 +267,18 @@ async def replay_conversation(
     }
 
 
-@router.get("/{chat_id}", response_model=list[ResponseConversation])
+@router.get("/{chat_id}", response_model=ConversationPage)
 async def get_conversations(
     chat_id: str,
+    before: Optional[str] = Query(None),
+    after: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
     db: AsyncIOMotorDatabase = Depends(get_db),
 ):
-    return await list_conversations(db, chat_id)
\ No newline at end of file
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    try:
+        return await list_conversations(db, chat_id, before, after, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
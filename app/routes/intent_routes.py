@@ -19,6 +19,7 @@ from app.crud.intent_crud import (
     delete_all_intents,
     IntentNotFound,
 )
+from app.services.engine_service import embedding_cache_stats
 from app.utils.database import get_database
 from app.models.pagination import PaginatedResponse
 
@@ -60,6 +61,11 @@ async def remove_all_intents(
     }
 
 
+@router.get("/embedding-cache")
+async def read_embedding_cache_stats():
+    return embedding_cache_stats()
+
+
 @router.get("", response_model=PaginatedResponse[ResponseIntent])
 async def list_intents(
     keyword: str = Query(None),
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from app.models.search import SearchResponse, SearchType
+from app.services.search_index_service import semantic_search
+from app.utils.database import get_database
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+router = APIRouter()
+
+# Dependency to get the database
+async def get_db():
+    db = await get_database()
+    return db
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[List[SearchType]] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    results = await semantic_search(db, q, types, limit)
+    return {"query": q, "results": results}
@@ -6,6 +6,11 @@ from app.core.socket_manager import manager
 router = APIRouter()
 
 
+@router.get("/ws/stats")
+async def read_socket_stats():
+    return manager.stats()
+
+
 @router.websocket("/ws/chat/{chat_id}")
 async def websocket_chat(websocket: WebSocket, chat_id: str):
 
@@ -0,0 +1,170 @@
+# app/services/chat_session_service.py
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.models.chat import Chat
+from app.utils.database import get_database
+
+logger = logging.getLogger(__name__)
+
+SESSION_FIELDS = ["current_intent_id", "failure_count", "is_bot_enabled"]
+
+
+class ChatSession:
+
+    def __init__(self, chat_id: str, current_intent_id: Optional[str], failure_count: int, is_bot_enabled: bool):
+        self.chat_id = chat_id
+        self.current_intent_id = current_intent_id
+        self.failure_count = failure_count
+        self.is_bot_enabled = is_bot_enabled
+
+    @classmethod
+    def from_chat(cls, chat_id: str, chat: Any) -> "ChatSession":
+        if isinstance(chat, Chat):
+            chat = chat.dict()
+
+        return cls(
+            chat_id=chat_id,
+            current_intent_id=chat.get("current_intent_id"),
+            failure_count=chat.get("failure_count") or 0,
+            is_bot_enabled=chat.get("is_bot_enabled", True),
+        )
+
+
+# ─────────────────────────────────────────────
+# 💬 CHAT SESSION STORE
+# ─────────────────────────────────────────────
+class ChatSessionStore:
+    """
+    Hot per-chat bot state with write-behind to Mongo.
+
+    Sessions are built from the chat document (the one the caller already
+    loaded on the send path, so admin toggles of `is_bot_enabled` from any
+    worker apply at once). Bot-state updates are applied in memory,
+    overlaid on every read until written, and flushed to `chats` in one
+    bulk write every `flush_seconds`. Only SESSION_FIELDS are written
+    behind; `updated_at` belongs to the message write.
+    """
+
+    def __init__(self, flush_seconds: float):
+        self.flush_seconds = flush_seconds
+
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # ─────────────────────────────
+    # READ
+    # ─────────────────────────────
+    async def get(
+        self,
+        db: AsyncIOMotorDatabase,
+        chat_id: str,
+        chat: Any = None,
+    ) -> Optional[ChatSession]:
+
+        if chat is None:
+            chat = await db.chats.find_one(
+                {"_id": ObjectId(chat_id)},
+                {field: 1 for field in SESSION_FIELDS},
+            )
+            if not chat:
+                return None
+
+        session = ChatSession.from_chat(chat_id, chat)
+
+        # Unflushed writes are newer than what Mongo returned
+        for field, value in self._dirty.get(chat_id, {}).items():
+            setattr(session, field, value)
+
+        return session
+
+    # ─────────────────────────────
+    # WRITE-BEHIND
+    # ─────────────────────────────
+    def update(self, session: ChatSession, **fields):
+        fields = {field: value for field, value in fields.items() if field in SESSION_FIELDS}
+
+        for field, value in fields.items():
+            setattr(session, field, value)
+
+        self._dirty.setdefault(session.chat_id, {}).update(fields)
+
+    def invalidate(self, chat_id: str, fields: Dict[str, Any]):
+        # A direct chat update wins over bot state not yet written
+        pending = self._dirty.get(chat_id)
+        if pending is None:
+            return
+
+        for field in fields:
+            pending.pop(field, None)
+        if not pending:
+            del self._dirty[chat_id]
+
+    def clear(self):
+        self._dirty.clear()
+
+    async def flush(self, db: AsyncIOMotorDatabase):
+        if not self._dirty:
+            return
+
+        # Entries stay in _dirty (and keep overlaying reads) until written;
+        # on failure they are simply retried next tick
+        dirty = {chat_id: dict(fields) for chat_id, fields in self._dirty.items()}
+
+        await db.chats.bulk_write(
+            [
+                UpdateOne({"_id": ObjectId(chat_id)}, {"$set": fields})
+                for chat_id, fields in dirty.items()
+            ],
+            ordered=False,
+        )
+
+        # Drop what was written, keeping fields updated again meanwhile
+        for chat_id, fields in dirty.items():
+            pending = self._dirty.get(chat_id)
+            if pending is None:
+                continue
+
+            for field, value in fields.items():
+                if field in pending and pending[field] == value:
+                    del pending[field]
+
+            if not pending:
+                del self._dirty[chat_id]
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush(await get_database())
+        except Exception:
+            logger.exception(f"Final chat session flush failed ({len(self._dirty)} chats unsaved)")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush(await get_database())
+            except Exception:
+                logger.exception("Chat session flush failed")
+
+
+chat_sessions = ChatSessionStore(
+    flush_seconds=settings.CHAT_SESSION_FLUSH_SECONDS,
+)
@@ -0,0 +1,194 @@
+# app/services/conversation_embedding_service.py
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.services.engine_service import embed_batch
+from app.utils.database import get_database
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# 🧵 BACKGROUND CONVERSATION EMBEDDING
+# ─────────────────────────────────────────────
+class ConversationEmbeddingWorker:
+    """
+    Fills `embedding` on conversation documents inserted with
+    `embedding_status: pending`, in batches, outside the request path.
+
+    Every API process runs one; a batch is claimed with a lease before it
+    is encoded, so processes never embed the same messages. A claim left
+    behind by a crashed process expires after `lease_seconds`.
+    """
+
+    def __init__(self, batch_size: int, poll_seconds: float, lease_seconds: float):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        logger.info("Conversation embedding worker started.")
+
+        while True:
+            try:
+                db = await get_database()
+                processed = await self.process_batch(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Conversation embedding batch failed")
+                processed = 0
+
+            # Full batch → more work is probably waiting
+            if processed >= self.batch_size:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim_batch(self, db: AsyncIOMotorDatabase) -> Tuple[str, List[Dict[str, Any]]]:
+        now = datetime.utcnow()
+        claimable = {
+            "embedding_status": "pending",
+            "$or": [
+                {"embedding_lease_until": None},
+                {"embedding_lease_until": {"$lt": now}},
+            ],
+        }
+
+        candidates = await (
+            db.conversations
+            .find(claimable, {"_id": 1})
+            .sort("created_at", 1)
+            .limit(self.batch_size)
+            .to_list(self.batch_size)
+        )
+        if not candidates:
+            return "", []
+
+        # Only the documents this update matched belong to us
+        claim = uuid4().hex
+        ids = [doc["_id"] for doc in candidates]
+
+        await db.conversations.update_many(
+            {**claimable, "_id": {"$in": ids}},
+            {"$set": {
+                "embedding_claim": claim,
+                "embedding_lease_until": now + timedelta(seconds=self.lease_seconds),
+            }},
+        )
+
+        docs = await db.conversations.find(
+            {"_id": {"$in": ids}, "embedding_claim": claim},
+            {"content": 1},
+        ).to_list(None)
+
+        return claim, docs
+
+    async def process_batch(self, db: AsyncIOMotorDatabase) -> int:
+        claim, docs = await self._claim_batch(db)
+
+        if not docs:
+            return 0
+
+        texts = [doc.get("content") or "" for doc in docs]
+        vectors = await embed_batch([text for text in texts if text])
+        vectors_iter = iter(vectors)
+
+        await db.conversations.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": doc["_id"], "embedding_status": "pending", "embedding_claim": claim},
+                    {
+                        "$set": {
+                            "embedding": next(vectors_iter) if text else None,
+                            "embedding_status": "done",
+                        },
+                        "$unset": {"embedding_claim": "", "embedding_lease_until": ""},
+                    },
+                )
+                for doc, text in zip(docs, texts)
+            ],
+            ordered=False,
+        )
+
+        return len(docs)
+
+
+conversation_embedding_worker = ConversationEmbeddingWorker(
+    batch_size=settings.CONVERSATION_EMBEDDING_BATCH_SIZE,
+    poll_seconds=settings.CONVERSATION_EMBEDDING_POLL_SECONDS,
+    lease_seconds=settings.CONVERSATION_EMBEDDING_LEASE_SECONDS,
+)
+
+
+# ─────────────────────────────────────────────
+# 🔁 BACKFILL
+# ─────────────────────────────────────────────
+async def backfill_conversation_embeddings(db: AsyncIOMotorDatabase) -> int:
+
+    # Rows written before the worker existed carry no status at all
+    await db.conversations.update_many(
+        {"embedding": None, "embedding_status": {"$exists": False}},
+        {"$set": {"embedding_status": "pending"}},
+    )
+
+    total = 0
+    while True:
+        processed = await conversation_embedding_worker.process_batch(db)
+        if not processed:
+            return total
+
+        total += processed
+        logger.info(f"Backfilled {total} conversation embeddings")
+
+
+async def _backfill():
+    from app.services.engine_service import shutdown_embedding_service
+    from app.utils.database import close_mongo_connection
+
+    db = await get_database()
+
+    try:
+        total = await backfill_conversation_embeddings(db)
+        logger.info(f"Backfill completed: {total} conversations embedded")
+    finally:
+        shutdown_embedding_service()
+        await close_mongo_connection()
+
+
+# Usage: python -m app.services.conversation_embedding_service
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_backfill())
@@ -0,0 +1,70 @@
+# app/services/course_counter_service.py
+
+import asyncio
+import logging
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# 🔁 COURSE COUNTER RECONCILIATION
+# ─────────────────────────────────────────────
+async def reconcile_course_counters(db: AsyncIOMotorDatabase) -> int:
+    """
+    Recomputes `students_count` / `comments_count` on every course from
+    enrollments and reviews. The crud functions keep them up to date
+    incrementally; this repairs drift and fills courses created before
+    the counters existed. Returns the number of courses whose counters changed.
+    """
+
+    # Grouped on the string form: refs may be strings or ObjectIds mid-migration
+    students = {
+        row["_id"]: row["count"]
+        async for row in db.enrollments.aggregate([
+            {"$group": {"_id": {"$toString": "$course_id"}, "count": {"$sum": 1}}},
+        ])
+    }
+
+    comments = {
+        row["_id"]: row["count"]
+        async for row in db.reviews.aggregate([
+            {"$match": {"$expr": {"$eq": [{"$toLower": "$type"}, "course"]}}},
+            {"$group": {"_id": {"$toString": "$type_id"}, "count": {"$sum": 1}}},
+        ])
+    }
+
+    operations = []
+
+    async for course in db.courses.find({}, {"students_count": 1, "comments_count": 1}):
+        course_id = str(course["_id"])
+        counters = {
+            "students_count": students.get(course_id, 0),
+            "comments_count": comments.get(course_id, 0),
+        }
+
+        if any(course.get(field) != value for field, value in counters.items()):
+            operations.append(UpdateOne({"_id": course["_id"]}, {"$set": counters}))
+
+    for i in range(0, len(operations), 1000):
+        await db.courses.bulk_write(operations[i:i + 1000], ordered=False)
+
+    return len(operations)
+
+
+async def _reconcile():
+    from app.utils.database import get_database, close_mongo_connection
+
+    db = await get_database()
+    try:
+        updated = await reconcile_course_counters(db)
+        logger.info(f"Course counters reconciled: {updated} courses updated")
+    finally:
+        await close_mongo_connection()
+
+
+# Usage: python -m app.services.course_counter_service
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_reconcile())
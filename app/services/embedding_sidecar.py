@@ -0,0 +1,122 @@
+# app/services/embedding_sidecar.py
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Frame: 4-byte big-endian length + JSON body.
+# Responses carry a JSON header {"rows", "dim"} followed by rows*dim float32s.
+_LENGTH = struct.Struct(">I")
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict:
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return json.loads(await reader.readexactly(length))
+
+
+def _write_frame(writer: asyncio.StreamWriter, body: dict):
+    data = json.dumps(body).encode("utf-8")
+    writer.write(_LENGTH.pack(len(data)) + data)
+
+
+# ─────────────────────────────────────────────
+# 🔌 CLIENT (USED BY WEB WORKERS)
+# ─────────────────────────────────────────────
+class SidecarClient:
+    """
+    Sends encode requests to the embedding sidecar over a Unix socket so
+    every web worker shares the sidecar's single copy of the model.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    async def encode(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.wait_for(self._encode(texts), timeout=self.timeout)
+
+    async def _encode(self, texts: List[str]) -> List[List[float]]:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+
+        try:
+            _write_frame(writer, {"texts": texts})
+            await writer.drain()
+
+            header = await _read_frame(reader)
+            if "error" in header:
+                raise RuntimeError(f"Embedding sidecar error: {header['error']}")
+
+            rows, dim = header["rows"], header["dim"]
+            payload = await reader.readexactly(rows * dim * 4)
+
+            return np.frombuffer(payload, dtype=np.float32).reshape(rows, dim).tolist()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+
+# ─────────────────────────────────────────────
+# 🧠 SERVER (ONE PROCESS PER BOX)
+# ─────────────────────────────────────────────
+async def serve(socket_path: str):
+    from app.services.engine_service import generate_embeddings, load_model
+
+    load_model()
+
+    # One inference thread: requests from all workers are serialized here
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+    loop = asyncio.get_running_loop()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    texts = request["texts"]
+                    if not texts:
+                        _write_frame(writer, {"rows": 0, "dim": 0})
+                        await writer.drain()
+                        continue
+
+                    vectors = await loop.run_in_executor(executor, generate_embeddings, texts)
+                    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+
+                    _write_frame(writer, {"rows": matrix.shape[0], "dim": matrix.shape[1]})
+                    writer.write(matrix.tobytes())
+                except Exception as e:
+                    logger.exception("Sidecar encode failed")
+                    _write_frame(writer, {"error": str(e)})
+
+                await writer.drain()
+        finally:
+            writer.close()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    os.chmod(socket_path, 0o660)
+
+    logger.info(f"Embedding sidecar listening on {socket_path}")
+
+    async with server:
+        await server.serve_forever()
+
+
+# Usage: EMBEDDING_SIDECAR_SOCKET=/tmp/embedding.sock python -m app.services.embedding_sidecar
+if __name__ == "__main__":
+    from app.core.config import settings
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(settings.EMBEDDING_SIDECAR_SOCKET or "/tmp/embedding.sock"))
@@ -1,27 +1,75 @@
 # app/services/engine_service.py
 
 import os
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import threading
 import numpy as np
-from typing import List, Optional
-from sentence_transformers import SentenceTransformer
-from rapidfuzz import fuzz
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import IndexModel, UpdateOne
+from rapidfuzz import fuzz, process
+
+from app.core.config import settings
+from app.utils.database import get_database
+
+logger = logging.getLogger(__name__)
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 os.environ["OMP_NUM_THREADS"] = "1"
 
-_model: Optional[SentenceTransformer] = None
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Indexes for the queries in this module (created by index_service)
+INDEXES = {
+    # Persisted vectors expire so the collection stays bounded
+    "embedding_cache": [
+        IndexModel("created_at", expireAfterSeconds=int(settings.EMBEDDING_CACHE_TTL_DAYS * 86400)),
+    ] if settings.EMBEDDING_CACHE_TTL_DAYS > 0 else [],
+}
+
+# SentenceTransformer or OnnxEncoder, both expose .encode()
+_model: Optional[Any] = None
+_model_lock = threading.Lock()
 
 
 # ─────────────────────────────────────────────
-# 🔥 LOAD MODEL (CALL ON STARTUP)
+# 🔥 LOAD MODEL (LAZY, ON FIRST ENCODE)
 # ─────────────────────────────────────────────
 def load_model():
     global _model
-    if _model is None:
-        _model = SentenceTransformer(
-            "all-MiniLM-L6-v2",
-            device="cpu"
-        )
+    if _model is not None:
+        return
+
+    with _model_lock:
+        if _model is not None:
+            return
+
+        if settings.EMBEDDING_ENGINE == "onnx":
+            from app.services.onnx_engine_service import OnnxEncoder
+
+            _model = OnnxEncoder(settings.ONNX_MODEL_DIR, settings.ONNX_QUANTIZED)
+        else:
+            from sentence_transformers import SentenceTransformer
+
+            _model = SentenceTransformer(
+                MODEL_NAME,
+                device="cpu"
+            )
+
+    logger.info(f"Embedding model loaded: {model_id()}")
+
+
+def model_id() -> str:
+    # Vectors from different engines are not interchangeable (cache keys)
+    if settings.EMBEDDING_ENGINE == "onnx":
+        return f"{MODEL_NAME}:onnx-{'int8' if settings.ONNX_QUANTIZED else 'fp32'}"
+    return MODEL_NAME
 
 
 # ─────────────────────────────────────────────
@@ -36,12 +84,405 @@ def normalize_vector(v: List[float]) -> List[float]:
 def generate_embedding(text: str) -> Optional[List[float]]:
     if not text:
         return None
-    if _model is None:
-        raise RuntimeError("Embedding model not loaded. Call load_model().")
+    load_model()
     vector = _model.encode(text)
     return normalize_vector(vector.tolist())
 
 
+def generate_embeddings(texts: List[str]) -> List[List[float]]:
+    if not texts:
+        return []
+    load_model()
+
+    vectors = np.asarray(
+        _model.encode(texts, batch_size=min(len(texts), settings.EMBEDDING_BATCH_SIZE)),
+        dtype=np.float32,
+    )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+
+    return (vectors / norms).tolist()
+
+
+# ─────────────────────────────────────────────
+# 🚚 INFERENCE DISPATCH
+# ─────────────────────────────────────────────
+_executor: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_slots: Optional[asyncio.Semaphore] = None
+_bulk_slots: Optional[asyncio.Semaphore] = None
+_sidecar = None
+_warm_up_task: Optional[asyncio.Task] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="embedding",
+        )
+    return _executor
+
+
+def _get_sidecar():
+    global _sidecar
+    if _sidecar is None:
+        from app.services.embedding_sidecar import SidecarClient
+
+        _sidecar = SidecarClient(
+            settings.EMBEDDING_SIDECAR_SOCKET,
+            timeout=settings.EMBEDDING_SIDECAR_TIMEOUT_SECONDS,
+        )
+    return _sidecar
+
+
+def _init_pool_worker():
+    # Each pool process loads the model once, up front
+    load_model()
+
+
+def _encode_in_pool_worker(texts: List[str]) -> np.ndarray:
+    return np.asarray(generate_embeddings(texts), dtype=np.float32)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool, _process_slots, _bulk_slots
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.EMBEDDING_PROCESS_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_pool_worker,
+        )
+        # Two lanes: bulk work (imports, backfills) can hold at most
+        # EMBEDDING_PROCESS_BULK_SLOTS chunks in the pool, so a live encode
+        # never queues behind a whole import
+        _process_slots = asyncio.Semaphore(settings.EMBEDDING_PROCESS_QUEUE_SIZE)
+        _bulk_slots = asyncio.Semaphore(settings.EMBEDDING_PROCESS_BULK_SLOTS)
+    return _process_pool
+
+
+async def _encode_in_process_pool(texts: List[str], bulk: bool = False) -> List[List[float]]:
+    pool = _get_process_pool()
+    loop = asyncio.get_running_loop()
+
+    # Bound now: a pool reset clears the globals while chunks are in flight
+    slots = _bulk_slots if bulk else _process_slots
+
+    # Large requests are split; bulk chunks go through the bulk lane a few
+    # at a time, between which live batches are picked up
+    chunk_size = settings.EMBEDDING_PROCESS_CHUNK_SIZE
+
+    async def run_chunk(chunk: List[str]) -> List[List[float]]:
+        # Backpressure: wait for a free slot instead of growing the queue
+        async with slots:
+            vectors = await loop.run_in_executor(pool, _encode_in_pool_worker, chunk)
+        return vectors.tolist()
+
+    try:
+        chunks = await asyncio.gather(*(
+            run_chunk(texts[i:i + chunk_size])
+            for i in range(0, len(texts), chunk_size)
+        ))
+    except BrokenProcessPool:
+        _reset_process_pool()
+        raise
+
+    return [vector for chunk in chunks for vector in chunk]
+
+
+def _reset_process_pool():
+    global _process_pool, _process_slots, _bulk_slots
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+    _process_pool = None
+    _process_slots = None
+    _bulk_slots = None
+
+
+async def encode_texts(texts: List[str], bulk: bool = False) -> List[List[float]]:
+    # With a sidecar configured, workers share its single copy of the model
+    if settings.EMBEDDING_SIDECAR_SOCKET:
+        return await _get_sidecar().encode(texts)
+
+    if settings.EMBEDDING_PROCESS_POOL_SIZE > 0:
+        return await _encode_in_process_pool(texts, bulk)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), generate_embeddings, texts)
+
+
+async def warm_up_model():
+    try:
+        await encode_texts(["warm up"])
+        logger.info("Embedding engine warmed up.")
+    except Exception:
+        logger.exception("Embedding engine warm-up failed")
+
+
+def start_warm_up():
+    global _warm_up_task
+    if _warm_up_task is None:
+        _warm_up_task = asyncio.create_task(warm_up_model())
+
+
+# ─────────────────────────────────────────────
+# 📦 BATCHED EMBEDDING SERVICE
+# ─────────────────────────────────────────────
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into one encode call.
+
+    Requests wait until either max_batch_size texts are queued or
+    max_wait_ms elapsed since the first one, then the whole batch is
+    handed to `encode` (executor thread or sidecar) and each caller's
+    future is resolved with its own vector.
+    """
+
+    def __init__(self, encode, max_batch_size: int, max_wait_ms: float):
+        self.encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Identical texts in one batch are encoded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        task = asyncio.ensure_future(self.encode(texts))
+        task.add_done_callback(lambda done: self._resolve(batch, texts, done))
+
+    @staticmethod
+    def _resolve(batch, texts: List[str], done: asyncio.Future):
+        if done.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+
+        error = done.exception()
+        vectors = None if error else dict(zip(texts, done.result()))
+
+        for text, future in batch:
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(vectors[text])
+
+
+# ─────────────────────────────────────────────
+# 🗄️ EMBEDDING CACHE
+# ─────────────────────────────────────────────
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+
+    Vectors are keyed by sha256(model name + text). Lookups hit an
+    in-process LRU first, then (for `use_store` callers) the
+    `embedding_cache` Mongo collection, whose entries expire after
+    EMBEDDING_CACHE_TTL_DAYS; newly computed vectors are written back.
+    """
+
+    def __init__(self, max_size: int, persist: bool):
+        self.max_size = max_size
+        self.persist = persist
+
+        self._items: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._pending_writes = set()
+
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(f"{model_id()}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._items[key] = vector
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def get_many(self, texts: List[str], use_store: bool = True) -> Dict[str, List[float]]:
+        found = {}
+        missing = {}
+
+        for text in texts:
+            key = self.key(text)
+            vector = self._items.get(key)
+
+            if vector is not None:
+                self._items.move_to_end(key)
+                found[text] = vector
+            else:
+                missing[key] = text
+
+        self.hits += len(found)
+
+        if missing and self.persist and use_store:
+            try:
+                db = await get_database()
+                docs = await db.embedding_cache.find(
+                    {"_id": {"$in": list(missing)}},
+                    {"embedding": 1},
+                ).to_list(None)
+            except Exception as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                docs = []
+
+            for doc in docs:
+                text = missing.pop(doc["_id"])
+                self._remember(doc["_id"], doc["embedding"])
+                found[text] = doc["embedding"]
+                self.store_hits += 1
+
+        self.misses += len(missing)
+
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]], use_store: bool = True):
+        if not vectors:
+            return
+
+        keyed = {self.key(text): vector for text, vector in vectors.items()}
+
+        for key, vector in keyed.items():
+            self._remember(key, vector)
+
+        if self.persist and use_store:
+            # Persist in the background, the caller already has its vectors
+            task = asyncio.create_task(self._store(keyed))
+            self._pending_writes.add(task)
+            task.add_done_callback(self._pending_writes.discard)
+
+    async def _store(self, keyed: Dict[str, List[float]]):
+        now = datetime.utcnow()
+
+        try:
+            db = await get_database()
+            await db.embedding_cache.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": key},
+                        {"$setOnInsert": {
+                            "model": model_id(),
+                            "embedding": vector,
+                            "created_at": now,
+                        }},
+                        upsert=True,
+                    )
+                    for key, vector in keyed.items()
+                ],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.store_hits + self.misses
+
+        return {
+            "model": model_id(),
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+_batcher = EmbeddingBatcher(
+    encode=encode_texts,
+    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+)
+
+_cache = EmbeddingCache(
+    max_size=settings.EMBEDDING_CACHE_SIZE,
+    persist=settings.EMBEDDING_CACHE_PERSIST,
+)
+
+
+async def embed(text: str) -> Optional[List[float]]:
+    if not text:
+        return None
+    # One-off texts (chat messages): a Mongo round trip costs about as much
+    # as encoding, so only the in-process LRU is consulted
+    return (await embed_many([text], use_store=False))[0]
+
+
+async def embed_many(texts: List[str], use_store: bool = True) -> List[Optional[List[float]]]:
+    unique = list(dict.fromkeys(text for text in texts if text))
+    vectors = await _cache.get_many(unique, use_store)
+
+    missing = [text for text in unique if text not in vectors]
+    if missing:
+        computed = dict(zip(
+            missing,
+            await asyncio.gather(*(_batcher.submit(text) for text in missing)),
+        ))
+        _cache.put_many(computed, use_store)
+        vectors.update(computed)
+
+    return [vectors[text] if text else None for text in texts]
+
+
+async def embed_batch(texts: List[str]) -> List[List[float]]:
+    # Bulk path (imports, backfills, the conversation worker): bulk lane
+    if not texts:
+        return []
+
+    unique = list(dict.fromkeys(texts))
+    vectors = await _cache.get_many(unique)
+
+    missing = [text for text in unique if text not in vectors]
+    if missing:
+        computed = dict(zip(missing, await encode_texts(missing, bulk=True)))
+        _cache.put_many(computed)
+        vectors.update(computed)
+
+    return [vectors[text] for text in texts]
+
+
+def embedding_cache_stats() -> Dict[str, float]:
+    return _cache.stats()
+
+
+def shutdown_embedding_service():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+    _reset_process_pool()
+
+
 def cosine_similarity(vec1, vec2):
     vec1 = np.array(vec1)
     vec2 = np.array(vec2)
@@ -55,6 +496,25 @@ def fuzzy_score(text1: str, text2: str) -> float:
     return fuzz.ratio(text1.lower(), text2.lower()) / 100
 
 
+def prepare_fuzzy_text(text: str) -> str:
+    return text.lower()
+
+
+def fuzzy_scores(text: str, choices: List[str]) -> np.ndarray:
+    # `choices` must already be prepared with prepare_fuzzy_text
+    if not choices:
+        return np.zeros(0, dtype=np.float32)
+
+    scores = process.cdist(
+        [prepare_fuzzy_text(text)],
+        choices,
+        scorer=fuzz.ratio,
+        processor=None,
+        dtype=np.float32,
+    )
+    return scores[0] / 100
+
+
 # ─────────────────────────────────────────────
 # 🧠 ADVANCED INTENT SCORING
 # ─────────────────────────────────────────────
@@ -74,6 +534,10 @@ def score_intent(message_embedding, message_text, intent):
     ]
     fuzzy_best = max(fuzzy_scores) if fuzzy_scores else 0
 
+    return combine_intent_score(embedding_score, fuzzy_best, intent)
+
+
+def combine_intent_score(embedding_score: float, fuzzy_best: float, intent) -> float:
     priority_boost = intent.get("priority", 0) * 0.02
 
     pos = intent.get("positive_feedback", 0)
@@ -87,4 +551,4 @@ def score_intent(message_embedding, message_text, intent):
         + feedback_boost
     )
 
-    return final_score
\ No newline at end of file
+    return final_score
@@ -0,0 +1,172 @@
+# app/services/index_service.py
+
+import asyncio
+import importlib
+import logging
+from typing import Any, Dict, List, Optional
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# Modules that declare an INDEXES registry
+INDEX_MODULES = [
+    "app.crud.blog_crud",
+    "app.crud.carousel_crud",
+    "app.crud.category_crud",
+    "app.crud.chat_crud",
+    "app.crud.conversation_crud",
+    "app.crud.course_crud",
+    "app.crud.data_type_crud",
+    "app.crud.doctor_crud",
+    "app.crud.enrollment_crud",
+    "app.crud.faq_crud",
+    "app.crud.gallery_crud",
+    "app.crud.instructor_crud",
+    "app.crud.intent_crud",
+    "app.crud.message_crud",
+    "app.crud.option_crud",
+    "app.crud.review_crud",
+    "app.crud.testimonial_crud",
+    "app.crud.user_crud",
+    "app.services.engine_service",
+]
+
+_task: Optional[asyncio.Task] = None
+
+
+def collect_indexes() -> Dict[str, List[IndexModel]]:
+    registry: Dict[str, List[IndexModel]] = {}
+
+    for module_name in INDEX_MODULES:
+        module = importlib.import_module(module_name)
+        for collection, indexes in getattr(module, "INDEXES", {}).items():
+            registry.setdefault(collection, []).extend(indexes)
+
+    return registry
+
+
+def _key(spec: Any) -> tuple:
+    return tuple((field, direction) for field, direction in dict(spec).items())
+
+
+# ─────────────────────────────────────────────
+# 🏗️ CREATION (IDEMPOTENT, BACKGROUND)
+# ─────────────────────────────────────────────
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    created = {}
+    collections = set(await db.list_collection_names())
+
+    for collection, indexes in collect_indexes().items():
+        existing = set()
+        if collection in collections:
+            for name, info in (await db[collection].index_information()).items():
+                existing |= {name, _key(info["key"])}
+
+        # Matched by key, or by name for text indexes (stored as _fts/_ftsx)
+        missing = [
+            index for index in indexes
+            if _key(index.document["key"]) not in existing and index.document["name"] not in existing
+        ]
+
+        # One at a time so a conflicting definition only skips that index
+        for index in missing:
+            try:
+                await db[collection].create_indexes([index])
+                created[collection] = created.get(collection, 0) + 1
+            except OperationFailure as e:
+                logger.warning(f"Index {index.document['name']} on {collection} not created: {e}")
+
+    logger.info(f"Indexes ensured ({sum(created.values())} created)")
+    return created
+
+
+def start_index_build():
+    global _task
+
+    async def run():
+        from app.utils.database import get_database
+
+        try:
+            await ensure_indexes(await get_database())
+        except Exception:
+            logger.exception("Index build failed")
+
+    if _task is None or _task.done():
+        _task = asyncio.create_task(run())
+
+
+async def stop_index_build():
+    global _task
+
+    if _task is not None and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
+
+
+# ─────────────────────────────────────────────
+# 📋 REPORT (MISSING / UNUSED / UNMANAGED)
+# ─────────────────────────────────────────────
+async def index_report(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    """
+    Per collection: registry indexes that do not exist yet, existing indexes
+    with no recorded use since the server started ($indexStats), and existing
+    indexes that no crud module declares.
+    """
+
+    registry = collect_indexes()
+    report = {}
+
+    for collection in sorted(set(registry) | set(await db.list_collection_names())):
+        if collection.startswith("system."):
+            continue
+
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        existing = {_key(s["key"]) for s in stats} | {s["name"] for s in stats}
+        declared = {_key(index.document["key"]): index.document["name"] for index in registry.get(collection, [])}
+
+        entry = {
+            "missing": [
+                name for key, name in declared.items()
+                if key not in existing and name not in existing
+            ],
+            "unused": [
+                s["name"] for s in stats
+                if s["name"] != "_id_" and s["accesses"]["ops"] == 0
+            ],
+            "unmanaged": [
+                s["name"] for s in stats
+                if s["name"] != "_id_"
+                and _key(s["key"]) not in declared
+                and s["name"] not in declared.values()
+            ],
+        }
+
+        if any(entry.values()):
+            report[collection] = entry
+
+    return report
+
+
+async def _report():
+    from app.utils.database import get_database, close_mongo_connection
+
+    db = await get_database()
+    try:
+        for collection, entry in (await index_report(db)).items():
+            for kind, names in entry.items():
+                for name in names:
+                    print(f"{collection:>16}  {kind:<10} {name}")
+    finally:
+        await close_mongo_connection()
+
+
+# Usage: python -m app.services.index_service
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_report())
@@ -0,0 +1,276 @@
+# app/services/intent_ann_service.py
+
+import logging
+import os
+import time
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.vectors import top_k
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# 🎯 EXACT BACKEND
+# ─────────────────────────────────────────────
+class ExactBackend:
+    name = "exact"
+
+    def __init__(self):
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def build(self, matrix: np.ndarray):
+        self._matrix = matrix
+
+    def patch(self, matrix: np.ndarray, keep: np.ndarray, added: int):
+        self._matrix = matrix
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self._matrix):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        similarities = self._matrix @ query
+        return top_k(np.arange(len(similarities)), similarities, k)
+
+
+# ─────────────────────────────────────────────
+# 🗂️ IVF BACKEND
+# ─────────────────────────────────────────────
+class IVFBackend:
+    """
+    Inverted-file index over request embeddings.
+
+    Rows are clustered with k-means; a query is compared against the
+    centroids first and only the rows of the `nprobe` closest lists are
+    scored exactly. Centroids are persisted to `path` and reused on the
+    next build as long as the embedding dimension matches and the row
+    count has not more than doubled since training.
+
+    `build` and `patch` are CPU-bound (k-means, row assignment); callers
+    run them off the event loop on a copy of the backend and swap it in.
+    """
+
+    name = "ivf"
+
+    def __init__(self, nlist: int, nprobe: int, path: Optional[str] = None):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.path = path
+
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_rows = 0
+
+        # Rows sorted by list; list i spans _list_starts[i]:_list_starts[i + 1]
+        self._labels = np.zeros(0, dtype=np.int64)
+        self._sorted_rows = np.zeros(0, dtype=np.int64)
+        self._list_starts = np.zeros(1, dtype=np.int64)
+
+        self._load_centroids()
+
+    def build(self, matrix: np.ndarray):
+        self._matrix = matrix
+
+        if not len(matrix):
+            self._set_labels(np.zeros(0, dtype=np.int64))
+            return
+
+        if self._needs_training(matrix):
+            self._train(matrix)
+
+        self._set_labels(self._assign(matrix))
+
+    def patch(self, matrix: np.ndarray, keep: np.ndarray, added: int):
+        # `matrix` is the previous one with rows[keep] kept in order and
+        # `added` rows appended: only the appended rows are assigned
+        if not len(matrix) or self._centroids is None or self._needs_training(matrix):
+            self.build(matrix)
+            return
+
+        labels = self._labels[keep]
+        if added:
+            labels = np.concatenate((labels, self._assign(matrix[-added:])))
+
+        self._matrix = matrix
+        self._set_labels(labels)
+
+    def _set_labels(self, labels: np.ndarray):
+        self._labels = labels
+        self._sorted_rows = np.argsort(labels, kind="stable")
+
+        counts = np.bincount(labels, minlength=0 if self._centroids is None else len(self._centroids))
+        self._list_starts = np.concatenate(([0], np.cumsum(counts)))
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(self._matrix):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        centroid_scores = self._centroids @ query
+        nprobe = min(self.nprobe, len(centroid_scores))
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        rows = np.concatenate([
+            self._sorted_rows[self._list_starts[p]:self._list_starts[p + 1]]
+            for p in probes
+        ])
+
+        similarities = self._matrix[rows] @ query
+        return top_k(rows, similarities, k)
+
+    # ─────────────────────────────
+    # TRAINING
+    # ─────────────────────────────
+    def _needs_training(self, matrix: np.ndarray) -> bool:
+        if self._centroids is None:
+            return True
+        if self._centroids.shape[1] != matrix.shape[1]:
+            return True
+        return len(matrix) > 2 * self._trained_rows
+
+    def _train(self, matrix: np.ndarray):
+        from sklearn.cluster import MiniBatchKMeans
+
+        nlist = self.nlist or int(np.sqrt(len(matrix)))
+        nlist = max(1, min(nlist, len(matrix)))
+
+        started = time.perf_counter()
+        kmeans = MiniBatchKMeans(n_clusters=nlist, random_state=0, n_init=3)
+        kmeans.fit(matrix)
+
+        # Spherical k-means: compare queries to unit-length centroids
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+
+        self._centroids = np.ascontiguousarray(centroids / norms)
+        self._trained_rows = len(matrix)
+
+        logger.info(
+            f"IVF intent index trained: {nlist} lists over {len(matrix)} rows "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+        self._save_centroids()
+
+    def _assign(self, matrix: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(matrix[i:i + chunk_size] @ self._centroids.T, axis=1)
+            for i in range(0, len(matrix), chunk_size)
+        ])
+
+    # ─────────────────────────────
+    # PERSISTENCE
+    # ─────────────────────────────
+    def _load_centroids(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with np.load(self.path) as data:
+                self._centroids = data["centroids"].astype(np.float32)
+                self._trained_rows = int(data["trained_rows"])
+            logger.info(f"IVF intent index loaded from {self.path}")
+        except Exception as e:
+            logger.warning(f"Could not load IVF intent index from {self.path}: {e}")
+            self._centroids = None
+            self._trained_rows = 0
+
+    def _save_centroids(self):
+        if not self.path:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp.npz"
+            np.savez(tmp_path, centroids=self._centroids, trained_rows=self._trained_rows)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not persist IVF intent index to {self.path}: {e}")
+
+
+def create_backend():
+    if settings.INTENT_ANN_BACKEND == "ivf":
+        return IVFBackend(
+            nlist=settings.INTENT_ANN_NLIST,
+            nprobe=settings.INTENT_ANN_NPROBE,
+            path=settings.INTENT_ANN_INDEX_PATH,
+        )
+    return ExactBackend()
+
+
+# ─────────────────────────────────────────────
+# 📊 RECALL / LATENCY COMPARISON
+# ─────────────────────────────────────────────
+def compare_with_exact(
+    backend,
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+) -> Dict[str, float]:
+
+    exact = ExactBackend()
+    exact.build(matrix)
+
+    recalls = []
+    exact_ms = []
+    ann_ms = []
+
+    for query in queries:
+        started = time.perf_counter()
+        expected, _ = exact.search(query, k)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        found, _ = backend.search(query, k)
+        ann_ms.append((time.perf_counter() - started) * 1000)
+
+        recalls.append(len(set(expected.tolist()) & set(found.tolist())) / len(expected))
+
+    return {
+        "rows": len(matrix),
+        "queries": len(queries),
+        "k": k,
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "exact_p50_ms": round(float(np.percentile(exact_ms, 50)), 3),
+        "exact_p99_ms": round(float(np.percentile(exact_ms, 99)), 3),
+        "ann_p50_ms": round(float(np.percentile(ann_ms, 50)), 3),
+        "ann_p99_ms": round(float(np.percentile(ann_ms, 99)), 3),
+    }
+
+
+async def _benchmark(num_queries: int = 200, k: int = 10):
+    from app.utils.database import get_database, close_mongo_connection
+
+    db = await get_database()
+    intents = await db.intents.find(
+        {"is_active": True},
+        {"request_embeddings": 1},
+    ).to_list(None)
+    await close_mongo_connection()
+
+    rows = [e for intent in intents for e in intent.get("request_embeddings") or [] if e]
+    if not rows:
+        print("No request embeddings found.")
+        return
+
+    matrix = np.ascontiguousarray(rows, dtype=np.float32)
+
+    # Queries: stored rows perturbed with noise, re-normalised
+    rng = np.random.default_rng(0)
+    queries = matrix[rng.choice(len(matrix), size=min(num_queries, len(matrix)), replace=False)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    backend = IVFBackend(nlist=settings.INTENT_ANN_NLIST, nprobe=settings.INTENT_ANN_NPROBE)
+    backend.build(matrix)
+
+    for key, value in compare_with_exact(backend, matrix, queries, k).items():
+        print(f"{key:>14}: {value}")
+
+
+# Usage: python -m app.services.intent_ann_service
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(_benchmark())
@@ -0,0 +1,403 @@
+# app/services/intent_index_service.py
+
+import asyncio
+import copy
+import logging
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.services.engine_service import combine_intent_score, fuzzy_scores, prepare_fuzzy_text
+from app.services.intent_ann_service import create_backend
+
+logger = logging.getLogger(__name__)
+
+# Intent fields kept in memory (embeddings live in the matrix)
+INDEXED_FIELDS = [
+    "intent",
+    "requests",
+    "responses",
+    "priority",
+    "is_fallback",
+    "positive_feedback",
+    "negative_feedback",
+]
+
+
+# ─────────────────────────────────────────────
+# 📚 IN-MEMORY INTENT INDEX
+# ─────────────────────────────────────────────
+class IntentIndex:
+    """
+    Process-resident copy of the active intents.
+
+    All request embeddings are stacked into one contiguous float32 matrix,
+    grouped by intent, so a message is scored against every intent with a
+    single matrix-vector product followed by a per-intent max.
+
+    With an ANN backend (INTENT_ANN_BACKEND=ivf) only the intents owning
+    the top INTENT_ANN_TOP_K rows are re-ranked with fuzzy and feedback
+    scores.
+    """
+
+    def __init__(self):
+        self._intents: Dict[str, Dict[str, Any]] = {}
+        self._embeddings: Dict[str, np.ndarray] = {}
+
+        # Row → intent map: rows _offsets[i]:_offsets[i + 1] belong to _row_ids[i]
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._row_ids: List[str] = []
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._row_owner = np.zeros(0, dtype=np.int64)
+
+        # Pre-processed request strings, grouped by intent the same way
+        self._request_texts: List[str] = []
+        self._request_ids: List[str] = []
+        self._request_offsets = np.zeros(0, dtype=np.int64)
+        self._request_spans: Dict[str, Tuple[int, int]] = {}
+
+        self._backend = create_backend()
+
+        self._loaded_at: Optional[float] = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self._reload_task: Optional[asyncio.Task] = None
+
+    # ─────────────────────────────
+    # LOADING
+    # ─────────────────────────────
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None or self._stale:
+            return False
+        ttl = settings.INTENT_INDEX_TTL_SECONDS
+        return ttl <= 0 or (time.monotonic() - self._loaded_at) < ttl
+
+    async def ensure_loaded(self, db: AsyncIOMotorDatabase):
+        if self.is_fresh():
+            return
+
+        # Only the very first load blocks; later reloads run in the
+        # background while the current index keeps serving
+        if self._loaded_at is None:
+            async with self._lock:
+                if self._loaded_at is None:
+                    await self.load(db)
+            return
+
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.create_task(self._reload(db))
+
+    async def _reload(self, db: AsyncIOMotorDatabase):
+        try:
+            async with self._lock:
+                if not self.is_fresh():
+                    await self.load(db)
+        except Exception:
+            logger.exception("Intent index reload failed")
+
+    async def load(self, db: AsyncIOMotorDatabase):
+        # Changes marked after this point trigger another reload
+        self._stale = False
+
+        intents = await db.intents.find({"is_active": True}).to_list(None)
+
+        entries = {}
+        embeddings = {}
+
+        for intent in intents:
+            entry, block = _entry(intent)
+            entries[entry["_id"]] = entry
+            if block is not None:
+                embeddings[entry["_id"]] = block
+
+        await self._rebuild(entries, embeddings)
+        self._loaded_at = time.monotonic()
+
+        logger.info(
+            f"Intent index loaded: {len(self._intents)} intents, "
+            f"{self._matrix.shape[0]} request embeddings"
+        )
+
+    def invalidate(self):
+        # Reload on next use, serving the current index until then
+        self._stale = True
+
+    # ─────────────────────────────
+    # PATCHING
+    # ─────────────────────────────
+    # Every change builds the new arrays in a worker thread, on copies, and
+    # swaps them in at once: requests keep scoring against the previous
+    # state meanwhile, and the lock keeps concurrent patches ordered.
+    async def upsert(self, intent: Dict[str, Any]):
+        # Not loaded yet → the next load picks the change up
+        if self._loaded_at is None:
+            return
+
+        if not intent.get("is_active", True):
+            await self.remove(str(intent["_id"]))
+            return
+
+        entry, block = _entry(intent)
+
+        async with self._lock:
+            await self._patch(entry["_id"], entry, block)
+
+    async def remove(self, intent_id: str):
+        async with self._lock:
+            if intent_id in self._intents:
+                await self._patch(intent_id, None, None)
+
+    async def clear(self):
+        async with self._lock:
+            await self._rebuild({}, {})
+            self._loaded_at = time.monotonic()
+
+    async def _rebuild(self, entries: Dict[str, Dict[str, Any]], embeddings: Dict[str, np.ndarray]):
+        backend = copy.copy(self._backend)
+        state = await asyncio.to_thread(_build_state, entries, embeddings, backend)
+        self._apply(state)
+
+    async def _patch(self, intent_id: str, entry: Optional[Dict[str, Any]], block: Optional[np.ndarray]):
+        entries = dict(self._intents)
+        embeddings = dict(self._embeddings)
+
+        entries.pop(intent_id, None)
+        embeddings.pop(intent_id, None)
+        if entry is not None:
+            entries[intent_id] = entry
+        if block is not None:
+            embeddings[intent_id] = block
+
+        # A new embedding dimension (engine switch) needs a full rebuild
+        if block is not None and len(self._matrix) and block.shape[1] != self._matrix.shape[1]:
+            await self._rebuild(entries, embeddings)
+            return
+
+        backend = copy.copy(self._backend)
+        state = await asyncio.to_thread(self._patched_state, intent_id, entries, embeddings, block, backend)
+        self._apply(state)
+
+    def _patched_state(self, intent_id, entries, embeddings, block, backend) -> Dict[str, Any]:
+        # Drop the intent's old block, append the new one at the end
+        row_ids = list(self._row_ids)
+        counts = self._counts
+        keep = np.ones(len(self._matrix), dtype=bool)
+
+        if intent_id in self._embeddings:
+            position = row_ids.index(intent_id)
+            start = int(self._offsets[position])
+            keep[start:start + int(counts[position])] = False
+
+            row_ids.pop(position)
+            counts = np.delete(counts, position)
+
+        blocks = [self._matrix[keep]] if keep.any() else []
+        if block is not None:
+            row_ids.append(intent_id)
+            counts = np.append(counts, len(block))
+            blocks.append(block)
+
+        if blocks:
+            matrix = np.ascontiguousarray(np.vstack(blocks), dtype=np.float32)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+
+        backend.patch(matrix, keep, 0 if block is None else len(block))
+
+        return {
+            **_row_state(matrix, row_ids, counts),
+            **_request_state(entries),
+            "_intents": entries,
+            "_embeddings": embeddings,
+            "_backend": backend,
+        }
+
+    def _apply(self, state: Dict[str, Any]):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    # ─────────────────────────────
+    # SCORING
+    # ─────────────────────────────
+    def embedding_scores(self, message_embedding) -> Dict[str, float]:
+        if not self._row_ids or message_embedding is None:
+            return {}
+
+        query = np.asarray(message_embedding, dtype=np.float32)
+        similarities = self._matrix @ query
+        best_per_intent = np.maximum.reduceat(similarities, self._offsets)
+
+        return dict(zip(self._row_ids, best_per_intent.tolist()))
+
+    def candidate_scores(self, message_embedding, k: int) -> Dict[str, float]:
+        if not self._row_ids or message_embedding is None:
+            return {}
+
+        query = np.asarray(message_embedding, dtype=np.float32)
+        rows, similarities = self._backend.search(query, k)
+
+        # Rows come back best-first, so the first hit per intent is its max
+        scores: Dict[str, float] = {}
+        for row, similarity in zip(rows.tolist(), similarities.tolist()):
+            scores.setdefault(self._row_ids[self._row_owner[row]], similarity)
+
+        return scores
+
+    def fuzzy_scores(self, message_text: str, intent_ids=None) -> Dict[str, float]:
+        if intent_ids is None:
+            if not self._request_ids:
+                return {}
+
+            scores = fuzzy_scores(message_text, self._request_texts)
+            best_per_intent = np.maximum.reduceat(scores, self._request_offsets)
+            return dict(zip(self._request_ids, best_per_intent.tolist()))
+
+        spans = [(i, self._request_spans[i]) for i in intent_ids if i in self._request_spans]
+        if not spans:
+            return {}
+
+        texts = [t for _, (start, end) in spans for t in self._request_texts[start:end]]
+        scores = fuzzy_scores(message_text, texts)
+
+        result = {}
+        position = 0
+        for intent_id, (start, end) in spans:
+            result[intent_id] = float(scores[position:position + end - start].max())
+            position += end - start
+
+        return result
+
+    def match(
+        self,
+        message_embedding,
+        message_text: str,
+        only_intent_id: Optional[str] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+
+        if only_intent_id is not None:
+            intent = self._intents.get(only_intent_id)
+            if intent is None:
+                return None, 0.0
+            candidates = [intent]
+
+            embeddings = self._embeddings.get(only_intent_id)
+            if embeddings is not None and message_embedding is not None:
+                query = np.asarray(message_embedding, dtype=np.float32)
+                embedding_scores = {only_intent_id: float(np.max(embeddings @ query))}
+            else:
+                embedding_scores = {}
+        elif self._backend.name == "exact":
+            candidates = self._intents.values()
+            embedding_scores = self.embedding_scores(message_embedding)
+        else:
+            embedding_scores = self.candidate_scores(
+                message_embedding,
+                settings.INTENT_ANN_TOP_K,
+            )
+            candidates = [self._intents[i] for i in embedding_scores]
+
+        if only_intent_id is None and self._backend.name == "exact":
+            fuzzy = self.fuzzy_scores(message_text)
+        else:
+            fuzzy = self.fuzzy_scores(message_text, [i["_id"] for i in candidates])
+
+        best_intent = None
+        best_score = 0.0
+
+        for intent in candidates:
+            score = combine_intent_score(
+                embedding_scores.get(intent["_id"], 0),
+                fuzzy.get(intent["_id"], 0),
+                intent,
+            )
+
+            if score > best_score:
+                best_score = score
+                best_intent = intent
+
+        return best_intent, best_score
+
+    def __len__(self):
+        return len(self._intents)
+
+
+def _entry(intent: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+    entry = {field: intent.get(field) for field in INDEXED_FIELDS}
+    entry["_id"] = str(intent["_id"])
+    entry["requests"] = entry["requests"] or []
+    entry["responses"] = entry["responses"] or []
+    entry["priority"] = entry["priority"] or 0
+    entry["positive_feedback"] = entry["positive_feedback"] or 0
+    entry["negative_feedback"] = entry["negative_feedback"] or 0
+    entry["fuzzy_requests"] = [prepare_fuzzy_text(r) for r in entry["requests"]]
+
+    embeddings = [e for e in intent.get("request_embeddings") or [] if e]
+    block = np.asarray(embeddings, dtype=np.float32) if embeddings else None
+
+    return entry, block
+
+
+def _row_state(matrix: np.ndarray, row_ids: List[str], counts: np.ndarray) -> Dict[str, Any]:
+    offsets = np.zeros(len(counts), dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)[:-1]
+
+    return {
+        "_matrix": matrix,
+        "_row_ids": row_ids,
+        "_counts": counts,
+        "_offsets": offsets,
+        "_row_owner": np.repeat(np.arange(len(row_ids)), counts),
+    }
+
+
+def _request_state(entries: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    texts: List[str] = []
+    ids: List[str] = []
+    offsets: List[int] = []
+    spans: Dict[str, Tuple[int, int]] = {}
+
+    for intent_id, intent in entries.items():
+        if not intent["fuzzy_requests"]:
+            continue
+
+        start = len(texts)
+        texts.extend(intent["fuzzy_requests"])
+
+        ids.append(intent_id)
+        offsets.append(start)
+        spans[intent_id] = (start, len(texts))
+
+    return {
+        "_request_texts": texts,
+        "_request_ids": ids,
+        "_request_offsets": np.array(offsets, dtype=np.int64),
+        "_request_spans": spans,
+    }
+
+
+def _build_state(entries, embeddings, backend) -> Dict[str, Any]:
+    row_ids = list(embeddings.keys())
+
+    if row_ids:
+        blocks = [embeddings[i] for i in row_ids]
+        counts = np.array([len(b) for b in blocks], dtype=np.int64)
+        matrix = np.ascontiguousarray(np.vstack(blocks), dtype=np.float32)
+    else:
+        counts = np.zeros(0, dtype=np.int64)
+        matrix = np.zeros((0, 0), dtype=np.float32)
+
+    backend.build(matrix)
+
+    return {
+        **_row_state(matrix, row_ids, counts),
+        **_request_state(entries),
+        "_intents": entries,
+        "_embeddings": embeddings,
+        "_backend": backend,
+    }
+
+
+intent_index = IntentIndex()
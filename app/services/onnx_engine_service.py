@@ -0,0 +1,223 @@
+# app/services/onnx_engine_service.py
+
+import json
+import logging
+import os
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+CONFIG_FILE = "engine_config.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+# ─────────────────────────────────────────────
+# ⚡ ONNX RUNTIME ENCODER
+# ─────────────────────────────────────────────
+class OnnxEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode backed by
+    onnxruntime. Runs the exported transformer and applies the same
+    attention-masked mean pooling as the all-MiniLM-L6-v2 pipeline.
+    Only onnxruntime and tokenizers are imported, never torch.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_ENGINE=onnx requires onnxruntime and tokenizers"
+            ) from e
+
+        model_path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"ONNX model not found at {model_path}. "
+                "Run: python -m app.services.onnx_engine_service export"
+            )
+
+        with open(os.path.join(model_dir, CONFIG_FILE)) as f:
+            config = json.load(f)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+
+        self._session = ort.InferenceSession(
+            model_path,
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self._tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        vectors = [
+            self._encode_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        vectors = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+        return vectors[0] if single else vectors
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self._session.run(["last_hidden_state"], feeds)[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (hidden * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+
+        return (summed / counts).astype(np.float32)
+
+
+# ─────────────────────────────────────────────
+# 📤 EXPORT (needs torch + sentence-transformers)
+# ─────────────────────────────────────────────
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample sentence"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+
+    dynamic_axes = {
+        "input_ids": {0: "batch", 1: "sequence"},
+        "attention_mask": {0: "batch", 1: "sequence"},
+        "token_type_ids": {0: "batch", 1: "sequence"},
+        "last_hidden_state": {0: "batch", 1: "sequence"},
+    }
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            fp32_path,
+            os.path.join(output_dir, INT8_FILE),
+            weight_type=QuantType.QInt8,
+        )
+
+    with open(os.path.join(output_dir, CONFIG_FILE), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+        }, f, indent=2)
+
+    logger.info(f"Exported {model_name} to {output_dir} (int8={quantize})")
+
+
+# ─────────────────────────────────────────────
+# ✅ PARITY CHECK
+# ─────────────────────────────────────────────
+PARITY_SENTENCES = [
+    "hello",
+    "hi, is anyone there?",
+    "what are your opening hours",
+    "how much does a dental implant cost",
+    "I want to book an appointment with the doctor",
+    "do you offer online courses on implantology",
+    "can I get a refund for my course enrollment",
+    "the payment failed but money was deducted",
+    "thank you so much",
+    "i need to talk to a human",
+]
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def check_parity(
+    model_name: str,
+    model_dir: str,
+    quantized: bool = True,
+    tolerance: float = 0.02,
+    sentences: Optional[List[str]] = None,
+) -> Dict[str, float]:
+    from sentence_transformers import SentenceTransformer
+
+    sentences = sentences or PARITY_SENTENCES
+
+    reference = _unit(np.asarray(
+        SentenceTransformer(model_name, device="cpu").encode(sentences),
+        dtype=np.float32,
+    ))
+    candidate = _unit(OnnxEncoder(model_dir, quantized).encode(sentences))
+
+    # Same sentence across engines, and the pairwise score matrix used for matching
+    self_similarity = np.sum(reference * candidate, axis=1)
+    score_drift = np.abs(reference @ reference.T - candidate @ candidate.T)
+
+    max_drift = float(score_drift.max())
+
+    return {
+        "sentences": len(sentences),
+        "min_self_cosine": round(float(self_similarity.min()), 4),
+        "max_score_drift": round(max_drift, 4),
+        "tolerance": tolerance,
+        "passed": max_drift <= tolerance,
+    }
+
+
+# Usage:
+#   python -m app.services.onnx_engine_service export
+#   python -m app.services.onnx_engine_service parity
+if __name__ == "__main__":
+    import sys
+    from app.core.config import settings
+    from app.services.engine_service import MODEL_NAME
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+
+    if command == "export":
+        export_onnx_model(MODEL_NAME, settings.ONNX_MODEL_DIR, settings.ONNX_QUANTIZED)
+        command = "parity"
+
+    if command == "parity":
+        result = check_parity(MODEL_NAME, settings.ONNX_MODEL_DIR, settings.ONNX_QUANTIZED)
+        for key, value in result.items():
+            print(f"{key:>16}: {value}")
+        sys.exit(0 if result["passed"] else 1)
@@ -0,0 +1,92 @@
+# app/services/reference_migration_service.py
+
+import asyncio
+import logging
+from typing import Dict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.utils.object_ids import ARRAY_REFERENCE_FIELDS, REFERENCE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+OBJECT_ID_PATTERN = "^[0-9a-fA-F]{24}$"
+
+
+def _convert(value: str) -> Dict:
+    # Anything that is not a valid ObjectId string is left as it is
+    return {"$convert": {"input": value, "to": "objectId", "onError": value, "onNull": None}}
+
+
+def _legacy_filter(field: str) -> Dict:
+    if field in ARRAY_REFERENCE_FIELDS:
+        return {field: {"$elemMatch": {"$type": "string", "$regex": OBJECT_ID_PATTERN}}}
+
+    return {field: {"$type": "string", "$regex": OBJECT_ID_PATTERN}}
+
+
+def _rewrite(field: str) -> list:
+    if field in ARRAY_REFERENCE_FIELDS:
+        return [{"$set": {field: {"$map": {"input": f"${field}", "as": "id", "in": _convert("$$id")}}}}]
+
+    return [{"$set": {field: _convert(f"${field}")}}]
+
+
+# ─────────────────────────────────────────────
+# 🔁 STRING → OBJECTID REFERENCE MIGRATION
+# ─────────────────────────────────────────────
+async def count_legacy_references(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    counts = {}
+
+    for collection, fields in REFERENCE_FIELDS.items():
+        for field in fields:
+            counts[f"{collection}.{field}"] = await db[collection].count_documents(_legacy_filter(field))
+
+    return counts
+
+
+async def migrate_references(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """
+    Rewrites string reference fields to native ObjectIds in place. Safe to
+    re-run and to run while the API is serving: the crud modules write
+    ObjectIds and read both forms until REFERENCE_DUAL_READ is turned off.
+    """
+
+    migrated = {}
+
+    for collection, fields in REFERENCE_FIELDS.items():
+        for field in fields:
+            result = await db[collection].update_many(_legacy_filter(field), _rewrite(field))
+            migrated[f"{collection}.{field}"] = result.modified_count
+
+            logger.info(f"{collection}.{field}: {result.modified_count} documents migrated")
+
+    return migrated
+
+
+async def _run(command: str):
+    from app.utils.database import get_database, close_mongo_connection
+
+    db = await get_database()
+
+    try:
+        if command == "migrate":
+            await migrate_references(db)
+
+        remaining = await count_legacy_references(db)
+        for key, count in remaining.items():
+            print(f"{key:>28}: {count}")
+
+        if not any(remaining.values()):
+            print("All references are ObjectIds; REFERENCE_DUAL_READ can be turned off.")
+    finally:
+        await close_mongo_connection()
+
+
+# Usage:
+#   python -m app.services.reference_migration_service check
+#   python -m app.services.reference_migration_service migrate
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(sys.argv[1] if len(sys.argv) > 1 else "check"))
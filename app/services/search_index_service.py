@@ -0,0 +1,367 @@
+# app/services/search_index_service.py
+
+import asyncio
+import logging
+import time
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo import ReplaceOne
+from rapidfuzz import fuzz, process
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.services.engine_service import embed, embed_batch, model_id, prepare_fuzzy_text
+from app.utils.vectors import top_k
+
+logger = logging.getLogger(__name__)
+
+# Searchable entity types: which fields are embedded and which are keyword-matched
+SEARCH_SOURCES: Dict[str, Dict[str, Any]] = {
+    "course": {
+        "collection": "courses",
+        "title": "name",
+        "fields": ["name", "short_desc", "description"],
+        "keyword_fields": ["name", "short_desc"],
+    },
+    "blog": {
+        "collection": "blogs",
+        "title": "name",
+        "fields": ["name", "short_desc", "desc"],
+        "keyword_fields": ["name", "short_desc"],
+    },
+    "faq": {
+        "collection": "faqs",
+        "title": "question",
+        "fields": ["question", "answer"],
+        "keyword_fields": ["question"],
+    },
+}
+
+
+def _field_text(value: Any) -> str:
+    if not value:
+        return ""
+    if isinstance(value, list):
+        # e.g. blog `desc`: [{"data_type_id", "value"}, ...]
+        return " ".join(_field_text(v.get("value") if isinstance(v, dict) else v) for v in value)
+    return str(value)
+
+
+def document_text(entity_type: str, doc: Dict[str, Any], fields_key: str = "fields") -> str:
+    fields = SEARCH_SOURCES[entity_type][fields_key]
+    return "\n".join(t for t in (_field_text(doc.get(f)).strip() for f in fields) if t)
+
+
+def touches_search(entity_type: str, update_data: Dict[str, Any]) -> bool:
+    # Partial updates that leave every embedded field alone skip re-embedding
+    return any(field in update_data for field in SEARCH_SOURCES[entity_type]["fields"])
+
+
+def _vector_doc(entity_type: str, entity_id: str, doc: Dict[str, Any], embedding: List[float]) -> Dict[str, Any]:
+    return {
+        "_id": f"{entity_type}:{entity_id}",
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "title": doc.get(SEARCH_SOURCES[entity_type]["title"]) or "",
+        "keyword_text": document_text(entity_type, doc, "keyword_fields"),
+        "embedding": embedding,
+        "model": model_id(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+# ─────────────────────────────────────────────
+# 🔎 SHARED CONTENT VECTOR INDEX
+# ─────────────────────────────────────────────
+class SearchIndex:
+    """
+    Process-resident copy of the `search_vectors` collection: one
+    normalized embedding per course / blog / FAQ stacked into a float32
+    matrix. A query is scored with one matrix product and the same top-k
+    selection as chat intents; the candidates are then re-ranked by a
+    hybrid of that similarity and a keyword score (rapidfuzz token-set
+    match against the title fields).
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+        self._row_keys: List[str] = []
+        self._row_index: Dict[str, int] = {}
+        self._row_types = np.zeros(0, dtype=object)
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    # ─────────────────────────────
+    # LOADING
+    # ─────────────────────────────
+    def is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        ttl = settings.SEARCH_INDEX_TTL_SECONDS
+        return ttl <= 0 or (time.monotonic() - self._loaded_at) < ttl
+
+    async def ensure_loaded(self, db: AsyncIOMotorDatabase):
+        if self.is_fresh():
+            return
+
+        async with self._lock:
+            if not self.is_fresh():
+                await self.load(db)
+
+    async def load(self, db: AsyncIOMotorDatabase):
+        # Vectors from another embedding model are not comparable; the
+        # backfill re-embeds them
+        docs = await db.search_vectors.find({"model": model_id()}).to_list(None)
+
+        self._apply(await asyncio.to_thread(_build_state, docs))
+        self._loaded_at = time.monotonic()
+
+        logger.info(f"Search index loaded: {len(self._entries)} documents")
+
+    # ─────────────────────────────
+    # WRITE PATH (called by crud)
+    # ─────────────────────────────
+    async def index_document(
+        self,
+        db: AsyncIOMotorDatabase,
+        entity_type: str,
+        entity_id: str,
+        doc: Dict[str, Any],
+    ):
+        # Search is secondary: a failed embedding must not fail the write.
+        # The backfill below repairs anything missed.
+        try:
+            embedding = await embed(document_text(entity_type, doc))
+            if embedding is None:
+                await self.remove_document(db, entity_type, entity_id)
+                return
+
+            vector_doc = _vector_doc(entity_type, entity_id, doc, embedding)
+            await db.search_vectors.replace_one({"_id": vector_doc["_id"]}, vector_doc, upsert=True)
+        except Exception:
+            logger.exception(f"Search indexing failed for {entity_type}:{entity_id}")
+            return
+
+        if self._loaded_at is None:
+            return
+
+        async with self._lock:
+            key = vector_doc["_id"]
+            vector = np.asarray(embedding, dtype=np.float32)
+            row = self._row_index.get(key)
+
+            if row is not None and vector.shape[0] == self._matrix.shape[1]:
+                # Existing row: patched in place, no copy of the matrix
+                self._matrix[row] = vector
+                self._entries[key] = _entry(vector_doc)
+            else:
+                self._apply(await asyncio.to_thread(self._state_with, key, vector_doc, vector))
+
+    async def remove_document(self, db: AsyncIOMotorDatabase, entity_type: str, entity_id: str):
+        key = f"{entity_type}:{entity_id}"
+
+        # Called after the row is gone: a failure here must not fail the
+        # delete. The backfill below prunes vectors left behind.
+        try:
+            await db.search_vectors.delete_one({"_id": key})
+        except Exception:
+            logger.exception(f"Search vector removal failed for {key}")
+
+        async with self._lock:
+            if key in self._entries:
+                self._apply(await asyncio.to_thread(self._state_with, key, None, None))
+
+    # Copies with one row added, replaced or dropped; runs off the event loop
+    def _state_with(self, key: str, vector_doc, vector) -> Dict[str, Any]:
+        entries = dict(self._entries)
+        keep = np.ones(len(self._row_keys), dtype=bool)
+
+        row = self._row_index.get(key)
+        if row is not None:
+            keep[row] = False
+            entries.pop(key)
+
+        row_keys = [k for k, kept in zip(self._row_keys, keep) if kept]
+        blocks = [self._matrix[keep]] if keep.any() else []
+
+        if vector_doc is not None:
+            entries[key] = _entry(vector_doc)
+            row_keys.append(key)
+            blocks.append(vector[None, :])
+
+        # Mixed dimensions only after a model switch; keep the new vector alone
+        if len({b.shape[1] for b in blocks}) > 1:
+            entries = {key: entries[key]}
+            row_keys = [key]
+            blocks = blocks[-1:]
+
+        return _row_state(entries, row_keys, blocks)
+
+    def _apply(self, state: Dict[str, Any]):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    # ─────────────────────────────
+    # QUERY
+    # ─────────────────────────────
+    def search(
+        self,
+        query_embedding,
+        query_text: str,
+        types: Optional[List[str]] = None,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+
+        if not self._row_keys or query_embedding is None:
+            return []
+
+        similarities = self._matrix @ np.asarray(query_embedding, dtype=np.float32)
+        rows = np.arange(len(similarities))
+
+        # Filter by type before top-k so a narrow filter still fills the page
+        if types:
+            mask = np.isin(self._row_types, types)
+            rows, similarities = rows[mask], similarities[mask]
+            if not len(rows):
+                return []
+
+        rows, similarities = top_k(rows, similarities, settings.SEARCH_CANDIDATES)
+
+        candidates = [
+            (self._entries[self._row_keys[row]], similarity)
+            for row, similarity in zip(rows.tolist(), similarities.tolist())
+        ]
+
+        keyword_scores = process.cdist(
+            [prepare_fuzzy_text(query_text)],
+            [entry["keyword_text"] for entry, _ in candidates],
+            scorer=fuzz.token_set_ratio,
+            processor=None,
+            dtype=np.float32,
+        )[0] / 100
+
+        weight = settings.SEARCH_HYBRID_WEIGHT
+        hits = [
+            {
+                "type": entry["type"],
+                "id": entry["id"],
+                "title": entry["title"],
+                "score": round(weight * semantic + (1 - weight) * float(keyword), 4),
+                "semantic_score": round(semantic, 4),
+                "keyword_score": round(float(keyword), 4),
+            }
+            for (entry, semantic), keyword in zip(candidates, keyword_scores)
+        ]
+
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+        return hits[:limit]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _entry(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "type": doc["entity_type"],
+        "id": doc["entity_id"],
+        "title": doc.get("title") or "",
+        "keyword_text": prepare_fuzzy_text(doc.get("keyword_text") or ""),
+    }
+
+
+def _row_state(entries: Dict[str, Dict[str, Any]], row_keys: List[str], blocks: List[np.ndarray]) -> Dict[str, Any]:
+    if blocks:
+        matrix = np.ascontiguousarray(np.vstack(blocks), dtype=np.float32)
+    else:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+
+    return {
+        "_entries": entries,
+        "_row_keys": row_keys,
+        "_row_index": {key: row for row, key in enumerate(row_keys)},
+        "_row_types": np.array([entries[k]["type"] for k in row_keys], dtype=object),
+        "_matrix": matrix,
+    }
+
+
+def _build_state(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    entries = {doc["_id"]: _entry(doc) for doc in docs}
+    row_keys = list(entries)
+    vectors = [np.asarray(doc["embedding"], dtype=np.float32) for doc in docs]
+
+    return _row_state(entries, row_keys, [np.vstack(vectors)] if vectors else [])
+
+
+search_index = SearchIndex()
+
+
+async def semantic_search(
+    db: AsyncIOMotorDatabase,
+    text: str,
+    types: Optional[List[str]] = None,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+
+    await search_index.ensure_loaded(db)
+    return search_index.search(await embed(text), text, types, limit)
+
+
+# ─────────────────────────────────────────────
+# 🔁 BACKFILL
+# ─────────────────────────────────────────────
+async def backfill_search_vectors(db: AsyncIOMotorDatabase, batch_size: int = 64) -> int:
+    total = 0
+
+    for entity_type, source in SEARCH_SOURCES.items():
+        projection = {field: 1 for field in source["fields"] + source["keyword_fields"]}
+        docs = await db[source["collection"]].find({}, projection).to_list(None)
+
+        # Vectors left behind by deletes whose removal failed
+        indexed = [f"{entity_type}:{d['_id']}" for d in docs if document_text(entity_type, d)]
+        result = await db.search_vectors.delete_many({"entity_type": entity_type, "_id": {"$nin": indexed}})
+        if result.deleted_count:
+            logger.info(f"Removed {result.deleted_count} orphaned {entity_type} vectors")
+
+        for i in range(0, len(docs), batch_size):
+            batch = [d for d in docs[i:i + batch_size] if document_text(entity_type, d)]
+            if not batch:
+                continue
+
+            embeddings = await embed_batch([document_text(entity_type, d) for d in batch])
+
+            await db.search_vectors.bulk_write([
+                ReplaceOne(
+                    {"_id": f"{entity_type}:{d['_id']}"},
+                    _vector_doc(entity_type, str(d["_id"]), d, embedding),
+                    upsert=True,
+                )
+                for d, embedding in zip(batch, embeddings)
+            ], ordered=False)
+
+            total += len(batch)
+            logger.info(f"Indexed {total} documents for search")
+
+    return total
+
+
+async def _backfill():
+    from app.services.engine_service import shutdown_embedding_service
+    from app.utils.database import get_database, close_mongo_connection
+
+    db = await get_database()
+    try:
+        total = await backfill_search_vectors(db)
+        logger.info(f"Search backfill completed: {total} documents")
+    finally:
+        shutdown_embedding_service()
+        await close_mongo_connection()
+
+
+# Usage: python -m app.services.search_index_service
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_backfill())
@@ -0,0 +1,153 @@
+# app/services/sender_snapshot_service.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.utils.object_ids import ref_match
+
+logger = logging.getLogger(__name__)
+
+# Process-local, only used with DENORMALIZED_SENDERS: a profile change is
+# seen at once by the worker that handled it, by the others within the TTL
+SNAPSHOT_CACHE_SIZE = 2048
+SNAPSHOT_TTL_SECONDS = 300
+
+_snapshots: "OrderedDict[str, tuple]" = OrderedDict()
+_pending_tasks = set()
+
+
+# ─────────────────────────────────────────────
+# 👤 SENDER SNAPSHOTS
+# ─────────────────────────────────────────────
+def sender_snapshot(user: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    return {
+        "name": f"{user.get('first_name') or ''} {user.get('last_name') or ''}",
+        "image_key": user.get("image_key"),
+    }
+
+
+def _remember(user_id: str, snapshot: Dict[str, Optional[str]]):
+    _snapshots[user_id] = (snapshot, time.monotonic() + SNAPSHOT_TTL_SECONDS)
+    _snapshots.move_to_end(user_id)
+
+    while len(_snapshots) > SNAPSHOT_CACHE_SIZE:
+        _snapshots.popitem(last=False)
+
+
+async def get_sender_snapshots(
+    db: AsyncIOMotorDatabase,
+    user_ids: Iterable[str],
+) -> Dict[str, Dict[str, Optional[str]]]:
+
+    found = {}
+    missing = []
+    now = time.monotonic()
+
+    # Read paths without denormalization always see the current profile
+    use_cache = settings.DENORMALIZED_SENDERS
+
+    for user_id in set(user_ids):
+        cached = _snapshots.get(user_id) if use_cache else None
+        if cached and cached[1] > now:
+            found[user_id] = cached[0]
+        elif ObjectId.is_valid(user_id):
+            missing.append(ObjectId(user_id))
+
+    if missing:
+        users = await db.users.find(
+            {"_id": {"$in": missing}},
+            {"first_name": 1, "last_name": 1, "image_key": 1},
+        ).to_list(None)
+
+        for user in users:
+            snapshot = sender_snapshot(user)
+            if use_cache:
+                _remember(str(user["_id"]), snapshot)
+            found[str(user["_id"])] = snapshot
+
+    return found
+
+
+# ─────────────────────────────────────────────
+# 🔄 PROFILE CHANGE PROPAGATION
+# ─────────────────────────────────────────────
+async def propagate_user_profile(db: AsyncIOMotorDatabase, user_id: str, user: Dict[str, Any]):
+    snapshot = sender_snapshot(user)
+    _remember(user_id, snapshot)
+
+    await db.conversations.update_many(
+        {"sender_id": user_id},
+        {"$set": {
+            "sender_name": snapshot["name"],
+            "sender_image_key": snapshot["image_key"],
+        }},
+    )
+    await db.chats.update_many(
+        {"user_id": ref_match(user_id)},
+        {"$set": {
+            "user_name": snapshot["name"],
+            "user_image_key": snapshot["image_key"],
+        }},
+    )
+
+
+def user_profile_changed(db: AsyncIOMotorDatabase, user_id: str, user: Dict[str, Any]):
+    _snapshots.pop(user_id, None)
+
+    if not settings.DENORMALIZED_SENDERS:
+        return
+
+    # Fan-out runs in the background; update_user returns immediately
+    task = asyncio.create_task(_propagate_safely(db, user_id, user))
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+async def _propagate_safely(db: AsyncIOMotorDatabase, user_id: str, user: Dict[str, Any]):
+    try:
+        await propagate_user_profile(db, user_id, user)
+    except Exception:
+        logger.exception(f"Sender snapshot propagation failed for user {user_id}")
+
+
+# ─────────────────────────────────────────────
+# 🔁 BACKFILL
+# ─────────────────────────────────────────────
+async def backfill_sender_snapshots(db: AsyncIOMotorDatabase) -> int:
+    user_ids = set(await db.conversations.distinct("sender_id"))
+    user_ids |= {str(u) for u in await db.chats.distinct("user_id")}
+
+    valid_ids = [ObjectId(u) for u in user_ids if u and ObjectId.is_valid(u)]
+
+    users = await db.users.find(
+        {"_id": {"$in": valid_ids}},
+        {"first_name": 1, "last_name": 1, "image_key": 1},
+    ).to_list(None)
+
+    for user in users:
+        await propagate_user_profile(db, str(user["_id"]), user)
+
+    return len(users)
+
+
+async def _backfill():
+    from app.utils.database import get_database, close_mongo_connection
+
+    db = await get_database()
+    try:
+        total = await backfill_sender_snapshots(db)
+        logger.info(f"Sender snapshots backfilled for {total} users")
+    finally:
+        await close_mongo_connection()
+
+
+# Usage: python -m app.services.sender_snapshot_service
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_backfill())
@@ -0,0 +1,21 @@
+# app/utils/cursor.py
+
+import base64
+from datetime import datetime
+from typing import Tuple
+from bson import ObjectId
+
+
+# Opaque keyset cursor over (timestamp, _id)
+def encode_cursor(value: datetime, _id) -> str:
+    raw = f"{value.isoformat()}|{_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        value, _id = raw.split("|", 1)
+        return datetime.fromisoformat(value), ObjectId(_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -45,28 +45,3 @@ async def get_database():
     if _db is None:
         await connect_to_mongo()
     return _db
-
-
-# -----------------------------------------
-# Index Creation
-# -----------------------------------------
-
-async def create_indexes():
-    db = await get_database()
-
-    logger.info("Creating MongoDB indexes...")
-
-    await db.property_categories.create_index("name", unique=True)
-
-    await db.intents.create_index("intent", unique=True)
-    await db.intents.create_index("created_at")
-    await db.intents.create_index("priority")
-    await db.intents.create_index("is_active")
-
-    await db.chats.create_index("user_id")
-    await db.chats.create_index("status")
-    
-    await db.conversations.create_index("chat_id")
-    await db.conversations.create_index("created_at")
-
-    logger.info("Indexes ensured successfully.")
\ No newline at end of file
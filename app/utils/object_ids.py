@@ -0,0 +1,96 @@
+# app/utils/object_ids.py
+
+from typing import Any, Dict, List
+from bson import ObjectId
+
+from app.core.config import settings
+
+# Reference fields stored as native ObjectIds, per collection
+REFERENCE_FIELDS: Dict[str, List[str]] = {
+    "courses": ["category_id", "instructor_ids"],
+    "blogs": ["doctor_id", "category_id"],
+    "faqs": ["category_id"],
+    "reviews": ["user_id", "replayer_id", "type_id"],
+    "enrollments": ["user_id", "course_id"],
+    "chats": ["user_id"],
+}
+
+ARRAY_REFERENCE_FIELDS = {"instructor_ids"}
+
+
+# ─────────────────────────────────────────────
+# ✍️ WRITE
+# ─────────────────────────────────────────────
+def to_ref(value: Any) -> Any:
+    if isinstance(value, list):
+        return [to_ref(v) for v in value]
+
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+
+    return value
+
+
+def refs_to_db(data: Dict[str, Any], collection: str) -> Dict[str, Any]:
+    for field in REFERENCE_FIELDS[collection]:
+        if field in data:
+            data[field] = to_ref(data[field])
+
+    return data
+
+
+# ─────────────────────────────────────────────
+# 📖 READ
+# ─────────────────────────────────────────────
+def _to_str(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_to_str(v) for v in value]
+
+    if isinstance(value, ObjectId):
+        return str(value)
+
+    return value
+
+
+def refs_to_str(doc: Dict[str, Any], collection: str) -> Dict[str, Any]:
+    for field in REFERENCE_FIELDS[collection]:
+        if field in doc:
+            doc[field] = _to_str(doc[field])
+
+    return doc
+
+
+def ref_match(value: Any) -> Any:
+    # Query value for a reference field; matches legacy string refs while dual-read is on
+    if not isinstance(value, str) or not ObjectId.is_valid(value):
+        return value
+
+    if settings.REFERENCE_DUAL_READ:
+        return {"$in": [value, ObjectId(value)]}
+
+    return ObjectId(value)
+
+
+def lookup_refs(*fields: str) -> List[Dict[str, Any]]:
+    """
+    Pipeline stages to run before $lookup on reference fields. Once every
+    document is migrated (REFERENCE_DUAL_READ=false) this is empty and the
+    lookups join on the stored ObjectIds directly; until then legacy string
+    values are converted in place ($convert leaves ObjectIds untouched).
+    """
+    if not settings.REFERENCE_DUAL_READ:
+        return []
+
+    def convert(value: str) -> Dict[str, Any]:
+        return {"$convert": {"input": value, "to": "objectId", "onError": value, "onNull": None}}
+
+    converted = {}
+    for field in fields:
+        if field in ARRAY_REFERENCE_FIELDS:
+            converted[field] = {
+                "$map": {"input": {"$ifNull": [f"${field}", []]}, "as": "id", "in": convert("$$id")}
+            }
+        else:
+            converted[field] = convert(f"${field}")
+
+    return [{"$addFields": converted}]
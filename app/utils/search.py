@@ -0,0 +1,78 @@
+# app/utils/search.py
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SORT = {"created_at": -1}
+
+# Collections whose text index has been seen to exist
+_text_indexed = set()
+
+
+def text_index(weights: Dict[str, int], name: Optional[str] = None) -> IndexModel:
+    # One text index per collection; weights rank matches in e.g. name above body text
+    return IndexModel(
+        [(field, TEXT) for field in weights],
+        weights=weights,
+        default_language="english",
+        name=name or "search_text",
+    )
+
+
+def regex_query(search_key: str, fields: List[str]) -> Dict[str, Any]:
+    pattern = re.escape(search_key.strip())
+    return {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fields]}
+
+
+async def _has_text_index(collection: AsyncIOMotorCollection) -> bool:
+    if collection.name not in _text_indexed:
+        indexes = await collection.index_information()
+        if any(field == "_fts" for info in indexes.values() for field, _ in info["key"]):
+            _text_indexed.add(collection.name)
+
+    return collection.name in _text_indexed
+
+
+async def resolve_search(
+    collection: AsyncIOMotorCollection,
+    query: Dict[str, Any],
+    search_key: Optional[str],
+    fields: List[str],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Returns (query, sort) for a list endpoint's `search_key`.
+
+    Uses the collection's text index ($text, ordered by textScore). Text
+    search matches whole (stemmed) words; with SEARCH_REGEX_FALLBACK (off
+    by default: it costs a probe plus an unindexed substring scan) a query
+    the index does not match falls back to a regex over `fields` so
+    partial words still match. The regex is also used while the
+    collection has no text index.
+    """
+
+    if not search_key or not search_key.strip():
+        return query, DEFAULT_SORT
+
+    text = {**query, "$text": {"$search": search_key}}
+
+    # No text index yet (background build still running, or it failed)
+    try:
+        if await _has_text_index(collection) and (
+            not settings.SEARCH_REGEX_FALLBACK or await collection.find_one(text, {"_id": 1})
+        ):
+            return text, {"score": {"$meta": "textScore"}, **DEFAULT_SORT}
+    except OperationFailure as e:
+        _text_indexed.discard(collection.name)
+        logger.warning(f"Text search unavailable on {collection.name}, using regex: {e}")
+
+    # $and keeps any $or already in `query`
+    regex = regex_query(search_key, fields)
+    return ({"$and": [query, regex]} if query else regex), DEFAULT_SORT
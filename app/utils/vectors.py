@@ -0,0 +1,14 @@
+# app/utils/vectors.py
+
+import numpy as np
+from typing import Tuple
+
+
+# Best `k` of `similarities` (all when k <= 0), best-first, with their row ids
+def top_k(rows: np.ndarray, similarities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if k <= 0 or k >= len(similarities):
+        order = np.argsort(-similarities)
+    else:
+        top = np.argpartition(-similarities, k - 1)[:k]
+        order = top[np.argsort(-similarities[top])]
+    return rows[order], similarities[order]